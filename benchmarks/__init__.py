@@ -0,0 +1 @@
+"""Cloud simulator and benchmarks of the BeSMART integration."""
@@ -0,0 +1,327 @@
+"""Benchmarks of the BeSMART integration against the cloud simulator.
+
+Sets the integration up in a headless Home Assistant instance talking to the
+simulator and measures:
+
+- setup time and the requests it takes
+- HTTP requests per scan cycle, with and without changes reported by the cloud
+- command-to-state latency, until the state shows a command and until the
+  cloud confirmed it
+- restart time from the stored data, and until that data was refreshed
+- TCP connections opened over the whole run
+- time and memory allocated to decode and parse a thermostat payload
+
+    python -m benchmarks.run --boxes 2 --thermostats 4 --latency 0.05 --check
+
+With --check the run fails when request counts exceed their budget, so that
+regressions in request volume show up in CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from homeassistant import config_entries, core, loader
+from homeassistant.const import CONF_MODE, CONF_NAME, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.helpers import (
+    area_registry as ar,
+    category_registry as cr,
+    device_registry as dr,
+    entity_registry as er,
+    floor_registry as fr,
+    issue_registry as ir,
+    label_registry as lr,
+)
+
+from .simulator import Simulator
+
+ROOT = Path(__file__).resolve().parent.parent
+DOMAIN = "besmart_thermostat"
+
+# Upper bounds of the requests each step may take, per configuration
+BUDGETS: dict[str, Callable[[argparse.Namespace], int | None]] = {
+    # login, then the WiFi box, thermostat and boiler data of every box
+    "setup_requests": lambda args: 1 + args.boxes * (args.thermostats + 2),
+    # only the WiFi box data while nothing changes
+    "idle_cycle_requests": lambda args: args.boxes,
+    # measured temperatures come with the WiFi box data, the thermostat data
+    # is only fetched on its own, slower interval
+    "changed_cycle_requests": lambda args: args.boxes,
+    # the write, then the WiFi box and thermostat data confirming it, unless
+    # the cloud takes a few polls to report it
+    "command_requests": lambda args: None if args.apply_delay else 3,
+    # entities are set up from the stored data, the cloud is only asked afterwards
+    "restart_requests": lambda args: 0,
+    # then the data of every box, the stored session saves the login
+    "restart_refresh_requests": lambda args: args.boxes * (args.thermostats + 2),
+}
+
+
+async def _async_start_hass(config_dir: str) -> core.HomeAssistant:
+    """Start a bare Home Assistant instance loading the integration from this repository."""
+    os.symlink(ROOT / "custom_components", Path(config_dir) / "custom_components")
+    hass = core.HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    await asyncio.gather(
+        ar.async_load(hass),
+        cr.async_load(hass),
+        dr.async_load(hass),
+        er.async_load(hass),
+        fr.async_load(hass),
+        ir.async_load(hass),
+        lr.async_load(hass),
+    )
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    hass.set_state(core.CoreState.running)
+    return hass
+
+
+def _requests(simulator: Simulator) -> int:
+    return sum(simulator.requests.values())
+
+
+def _expire_cache(entry: config_entries.ConfigEntry) -> None:
+    """Drop cached responses, as if a full scan interval passed."""
+    entry.runtime_data._cache.clear()
+
+
+async def _async_wait_for(predicate: Callable[[], bool], timeout: float = 30) -> None:
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+
+async def bench_setup(
+    hass: core.HomeAssistant,
+    simulator: Simulator,
+    request_rate: int,
+) -> tuple[config_entries.ConfigEntry, dict]:
+    """Set up a config entry for the simulated account."""
+    entry = config_entries.ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="BeSMART",
+        data={},
+        options={
+            CONF_NAME: "BeSMART",
+            CONF_USERNAME: simulator.username,
+            CONF_PASSWORD: simulator.password,
+            CONF_MODE: ["heat"],
+            "request_rate": request_rate,
+        },
+        source=config_entries.SOURCE_USER,
+        unique_id=None,
+        discovery_keys={},
+    )
+    requests = _requests(simulator)
+    started = time.perf_counter()
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - started
+    if entry.state is not config_entries.ConfigEntryState.LOADED:
+        raise RuntimeError(f"Setup failed: {entry.state} {entry.reason}")
+    return entry, {
+        "setup_seconds": elapsed,
+        "setup_requests": _requests(simulator) - requests,
+    }
+
+
+async def bench_scan_cycles(
+    entry: config_entries.ConfigEntry,
+    simulator: Simulator,
+    cycles: int,
+) -> dict:
+    """Run scan cycles of all WiFi boxes, unchanged and with changed thermostats."""
+
+    async def cycle() -> tuple[int, float]:
+        _expire_cache(entry)
+        requests = _requests(simulator)
+        started = time.perf_counter()
+        await asyncio.gather(*(x.coordinator.async_refresh() for x in entry.interface_devices))
+        return _requests(simulator) - requests, time.perf_counter() - started
+
+    idle = [await cycle() for _ in range(cycles)]
+    changed = []
+    for _ in range(cycles):
+        simulator.tick()
+        changed.append(await cycle())
+    return {
+        "idle_cycle_requests": max(x for x, _ in idle),
+        "idle_cycle_seconds": sum(x for _, x in idle) / cycles,
+        "changed_cycle_requests": max(x for x, _ in changed),
+        "changed_cycle_seconds": sum(x for _, x in changed) / cycles,
+    }
+
+
+async def bench_command(
+    hass: core.HomeAssistant,
+    entry: config_entries.ConfigEntry,
+    simulator: Simulator,
+) -> dict:
+    """Change the preset of a thermostat and wait until its state reflects it."""
+    device = entry.interface_devices[0]
+    room_id = device.thermostats[0].id
+    entity_id = er.async_get(hass).async_get_entity_id("climate", DOMAIN, f"{entry.entry_id}:{room_id}")
+
+    def state():
+        return hass.states.get(entity_id)
+
+    _expire_cache(entry)
+    requests = _requests(simulator)
+    started = time.perf_counter()
+    await hass.services.async_call(
+        "climate",
+        "set_preset_mode",
+        {"entity_id": entity_id, "preset_mode": "ECO"},
+        blocking=True,
+    )
+    await _async_wait_for(lambda: state().attributes.get("preset_mode") == "ECO")
+    shown = time.perf_counter() - started
+    await _async_wait_for(lambda: not device.coordinator.pending.is_pending(room_id))
+    confirmed = time.perf_counter() - started
+    await hass.async_block_till_done()
+    return {
+        "command_to_state_seconds": shown,
+        "command_to_confirmed_seconds": confirmed,
+        "command_requests": _requests(simulator) - requests,
+    }
+
+
+async def bench_restart(
+    hass: core.HomeAssistant,
+    entry: config_entries.ConfigEntry,
+    simulator: Simulator,
+) -> dict:
+    """Reload the config entry and wait until its stored data was refreshed."""
+    requests = _requests(simulator)
+    started = time.perf_counter()
+    await hass.config_entries.async_reload(entry.entry_id)
+    elapsed = time.perf_counter() - started
+    restart_requests = _requests(simulator) - requests
+    await _async_wait_for(lambda: not any(x.coordinator.data.stale for x in entry.interface_devices))
+    refreshed = time.perf_counter() - started
+    await hass.async_block_till_done()
+    return {
+        "restart_seconds": elapsed,
+        "restart_requests": restart_requests,
+        "restart_refreshed_seconds": refreshed,
+        "restart_refresh_requests": _requests(simulator) - requests,
+    }
+
+
+def bench_decode(simulator: Simulator, iterations: int = 2000) -> dict:
+    """Decode and parse a thermostat payload the way a poll does."""
+    from custom_components.besmart_thermostat.api import BesmartClient
+    from custom_components.besmart_thermostat.models import parse_thermostat
+    from homeassistant.util import dt as dt_util
+
+    box = next(iter(simulator.boxes.values()))
+    thermostat = next(iter(box["thermostats"].values()))
+    body = json.dumps({"error_code": "0", "message": thermostat}).encode()
+    now = dt_util.now()
+    previous = parse_thermostat(BesmartClient._decode(body)["message"])
+
+    def poll() -> None:
+        snapshot = parse_thermostat(BesmartClient._decode(body)["message"])
+        # what the coordinator and the entity do with an updated snapshot
+        assert snapshot == previous
+        snapshot.program.mark_at(now)
+        snapshot.program.next_transition(now)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        poll()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    poll()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "decode_microseconds": elapsed / iterations * 1e6,
+        "decode_peak_bytes": peak,
+    }
+
+
+async def async_run(args: argparse.Namespace) -> dict:
+    """Run all benchmarks and return their results."""
+    simulator = Simulator(
+        boxes=args.boxes,
+        thermostats=args.thermostats,
+        latency=args.latency,
+        apply_delay=args.apply_delay,
+        seed=0,
+    )
+    url = await simulator.start()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_start_hass(config_dir)
+        try:
+            from custom_components.besmart_thermostat.api import BesmartClient
+
+            BesmartClient.BASE_URL = url
+            entry, results = await bench_setup(hass, simulator, args.request_rate)
+            results |= await bench_scan_cycles(entry, simulator, args.cycles)
+            results |= await bench_command(hass, entry, simulator)
+            results |= await bench_restart(hass, entry, simulator)
+            results["connections"] = len(simulator.connections)
+            results |= bench_decode(simulator)
+            await hass.config_entries.async_unload(entry.entry_id)
+        finally:
+            await hass.async_stop(force=True)
+            await simulator.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boxes", type=int, default=2)
+    parser.add_argument("--thermostats", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--apply-delay", type=float, default=0.0, help="seconds until writes are reported")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument(
+        "--request-rate",
+        type=int,
+        default=600,
+        help="request budget of the account, high enough for cycles run back to back",
+    )
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    parser.add_argument("--check", action="store_true", help="fail when request counts exceed their budget")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("homeassistant.loader").setLevel(logging.ERROR)
+    sys.path.insert(0, str(ROOT))
+    results = asyncio.run(async_run(args))
+
+    print(f"{args.boxes} WiFi boxes x {args.thermostats} thermostats, {args.latency * 1000:.0f}ms latency")
+    failed = []
+    for name, value in results.items():
+        line = f"  {name:32} {value:10.3f}" if isinstance(value, float) else f"  {name:32} {value:10}"
+        budget = BUDGETS[name](args) if name in BUDGETS else None
+        if budget is not None:
+            line += f"   (budget {budget})"
+            if value > budget:
+                failed.append(name)
+                line += "  OVER BUDGET"
+        print(line)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.check and failed:
+        sys.exit(f"Request budget exceeded: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Local stand-in for the BeSMART cloud API.
+
+Implements the endpoints used by BesmartClient with payloads shaped like the
+real ones, for N WiFi boxes with M thermostats each. Latency and errors can be
+injected to see how the integration copes with a slow or flaky cloud.
+
+Run it standalone with:
+
+    python -m benchmarks.simulator --boxes 2 --thermostats 4 --latency 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+BASE_PATH = "/BeSMART_release/v1/api/"
+TOKEN = "a69157a524fdcf0246a58fc5767683c700c5b7b4"
+THERMOSTAT_SLOTS = 8
+
+# Payload fields reported by the WiFi box data for each thermostat, the
+# thermostat data holds all of them
+SUMMARY_FIELDS = (
+    "id", "name", "mode", "season", "unit", "current_temp", "target_temp",
+    "heating_status", "battery_power",
+)
+
+# Weekday program: economy at night, comfort in the morning and the evening
+DAY_PROGRAM = [1] * 13 + [2] * 5 + [1] * 18 + [2] * 9 + [1] * 3
+
+
+class Simulator:
+    """Simulated BeSMART cloud holding the state of all devices."""
+
+    def __init__(
+        self,
+        boxes: int = 1,
+        thermostats: int = 4,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        apply_delay: float = 0.0,
+        seed: int | None = None,
+        username: str = "user",
+        password: str = "password",
+    ) -> None:
+        """Initialize the simulator with all devices in their default state."""
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.apply_delay = apply_delay
+        self.username = username
+        self.password = password
+        self.user_id = "1001"
+        self.logged_in = False
+        self.requests: Counter[str] = Counter()
+        # Client addresses of all connections, to tell reused connections from new ones
+        self.connections: set[tuple] = set()
+        self.bytes_sent = 0
+        self._random = random.Random(seed)
+        self._failures: list[int] = []
+        self._runner: web.AppRunner | None = None
+
+        self.boxes: dict[str, dict] = {}
+        for box in range(boxes):
+            box_id = str(5000 + box)
+            self.boxes[box_id] = {
+                "boiler": {
+                    "mode": "1",
+                    "work_mode": "0",
+                    "unit": "0",
+                    "dhw_current_temp": "48.0",
+                    "dhw_target_temp": "50",
+                    "flame_status": "0",
+                    "system_pressure": "1.4",
+                },
+                "thermostats": {
+                    str(box * 100 + x + 1): self._thermostat(str(box * 100 + x + 1), f"Room {x + 1}")
+                    for x in range(thermostats)
+                },
+            }
+
+    @staticmethod
+    def _thermostat(thermostat_id: str, name: str) -> dict:
+        return {
+            "id": thermostat_id,
+            "name": name,
+            "mode": "0",
+            "season": "1",
+            "unit": "0",
+            "current_temp": "20.4",
+            "target_temp": "21.0",
+            "frost_temp": "5.0",
+            "economy_temp": "17.0",
+            "comfort_temp": "21.0",
+            "heating_status": "0",
+            "battery_power": "1",
+            "advance": "0",
+            "holiday_end_time": "0",
+            "min_heating_set_point": "20",
+            "max_heating_set_point": "80",
+            "sensor_influence": "0",
+            "climatic_curve": "0",
+            "program": [list(DAY_PROGRAM) for _ in range(7)],
+        }
+
+    @property
+    def url(self) -> str:
+        """Return the base URL to use instead of BesmartClient.BASE_URL."""
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def thermostat(self, thermostat_id: str) -> dict:
+        """Return the state of a thermostat."""
+        for box in self.boxes.values():
+            if thermostat_id in box["thermostats"]:
+                return box["thermostats"][thermostat_id]
+        raise KeyError(thermostat_id)
+
+    def tick(self, delta: float = 0.1) -> None:
+        """Change the measured temperature of every thermostat, as if time passed."""
+        for box in self.boxes.values():
+            for thermostat in box["thermostats"].values():
+                thermostat["current_temp"] = f"{float(thermostat['current_temp']) + delta:.1f}"
+
+    def fail(self, count: int = 1, status: int = 500) -> None:
+        """Answer the next requests with the given HTTP status."""
+        self._failures.extend([status] * count)
+
+    def expire_session(self) -> None:
+        """Reject all requests until the client logs in again."""
+        self.logged_in = False
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def app(self) -> web.Application:
+        """Return the aiohttp application serving the API."""
+        user = "user_id/{user}"
+        box = "wifi_box_id/{wifi_box}"
+        token = "token/{token}"
+        thermostat = "thermostat_id/{thermostat}"
+        routes = [
+            web.get("iOS/users/login_new", self._login),
+            web.get(f"Android/Wifi_boxes/data/{user}/{box}/{token}", self._get_wifi_box),
+            web.get(f"Android/Thermostats/data/{user}/{box}/{token}/{thermostat}", self._get_thermostat),
+            web.get(f"Android/thermostats/setting/{user}/{box}/{token}/{thermostat}", self._get_settings),
+            web.get(f"Android/thermostats/program/{user}/{box}/{thermostat}/day/{{day}}/{token}", self._get_program),
+            web.get(f"Android/Boilers/data/{user}/{box}/{token}", self._get_boiler),
+            web.put("Android/Thermostats/temperature", self._set_temperature),
+            web.put("Android/Thermostats/advance", self._set_thermostat_field("advance")),
+            web.put("Android/Thermostats/mode", self._set_thermostat_field("mode")),
+            web.put("Android/Thermostats/holiday_end_time", self._set_thermostat_field("holiday_end_time")),
+            web.put("Android/Thermostats/setting", self._set_settings),
+            web.put("Android/Thermostats/program_196", self._set_program),
+            web.put("Android/Boilers/work_mode", self._set_boiler_field("work_mode", "mode")),
+            web.put("Android/Boilers/dhw_target_temp", self._set_boiler_field("dhw_target_temp", "temp")),
+        ]
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes(
+            web.route(route.method, BASE_PATH + route.path, route.handler)
+            for route in routes
+        )
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        resource = request.match_info.route.resource
+        path = resource.canonical if resource else request.path
+        self.requests[f"{request.method} {path.removeprefix(BASE_PATH)}"] += 1
+        if request.transport is not None:
+            self.connections.add(request.transport.get_extra_info("peername"))
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        if self._failures:
+            return web.Response(status=self._failures.pop(0), text="Injected failure")
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=503, text="Injected failure")
+        response = await handler(request)
+        self.bytes_sent += response.content_length or 0
+        return response
+
+    def _reply(self, message) -> web.Response:
+        return web.json_response({"error_code": "0", "message": message})
+
+    def _authorize(self, user_id: str, token: str) -> web.Response | None:
+        if not self.logged_in or user_id != self.user_id or token != TOKEN:
+            return web.json_response({"error_code": "6", "message": "Invalid session"})
+        return None
+
+    def _box(self, request: web.Request) -> dict:
+        box = self.boxes.get(request.match_info.get("wifi_box") or request["form"].get("wifi_box_id"))
+        if box is None:
+            raise web.HTTPNotFound()
+        return box
+
+    async def _login(self, request: web.Request) -> web.Response:
+        query = request.query
+        if query.get("username") != self.username or query.get("password") != self.password:
+            return web.json_response({"error_code": "6", "message": "Invalid credentials"})
+        self.logged_in = True
+        return self._reply({
+            "user": {"id": self.user_id, "username": self.username},
+            "wifi_box": [{"id": x} for x in self.boxes],
+        })
+
+    async def _get(self, request: web.Request, build) -> web.Response:
+        denied = self._authorize(request.match_info["user"], request.match_info["token"])
+        if denied is not None:
+            return denied
+        return self._reply(build(self._box(request)))
+
+    async def _get_wifi_box(self, request: web.Request) -> web.Response:
+        def build(box):
+            thermostats = [
+                {field: thermostat[field] for field in SUMMARY_FIELDS}
+                for thermostat in box["thermostats"].values()
+            ]
+            thermostats += [{"id": None}] * (THERMOSTAT_SLOTS - len(thermostats))
+            return {"boiler": dict(box["boiler"]), "thermostat": thermostats}
+        return await self._get(request, build)
+
+    async def _get_thermostat(self, request: web.Request) -> web.Response:
+        return await self._get(request, lambda box: dict(self._box_thermostat(box, request)))
+
+    async def _get_settings(self, request: web.Request) -> web.Response:
+        fields = ("unit", "season", "min_heating_set_point", "max_heating_set_point", "sensor_influence", "climatic_curve")
+        return await self._get(
+            request,
+            lambda box: {field: self._box_thermostat(box, request)[field] for field in fields},
+        )
+
+    async def _get_program(self, request: web.Request) -> web.Response:
+        day = int(request.match_info["day"])
+        return await self._get(
+            request,
+            lambda box: {"day": day, "program": self._box_thermostat(box, request)["program"][day]},
+        )
+
+    async def _get_boiler(self, request: web.Request) -> web.Response:
+        return await self._get(request, lambda box: dict(box["boiler"]))
+
+    def _box_thermostat(self, box: dict, request: web.Request) -> dict:
+        thermostat_id = request.match_info.get("thermostat") or request["form"].get("thermostat_id")
+        thermostat = box["thermostats"].get(thermostat_id)
+        if thermostat is None:
+            raise web.HTTPNotFound()
+        return thermostat
+
+    async def _put(self, request: web.Request, apply) -> web.Response:
+        form = await request.post()
+        request["form"] = form
+        denied = self._authorize(form.get("user_id"), form.get("token"))
+        if denied is not None:
+            return denied
+        changes = apply(self._box(request), form)
+        # The cloud takes a while until the devices report a change
+        if self.apply_delay:
+            asyncio.get_running_loop().call_later(self.apply_delay, changes)
+        else:
+            changes()
+        return self._reply("OK")
+
+    async def _set_temperature(self, request: web.Request) -> web.Response:
+        fields = {"0": "frost_temp", "1": "economy_temp", "2": "comfort_temp"}
+
+        def apply(box, form):
+            thermostat = self._box_thermostat(box, request)
+            value = f"{int(form['integer_part'])}.{int(form['fraction_part'])}"
+            return lambda: thermostat.update({fields[form["temp_mode"]]: value, "target_temp": value})
+        return await self._put(request, apply)
+
+    def _set_thermostat_field(self, field: str):
+        async def handler(request: web.Request) -> web.Response:
+            def apply(box, form):
+                thermostat = self._box_thermostat(box, request)
+                return lambda: thermostat.update({field: form[field]})
+            return await self._put(request, apply)
+        return handler
+
+    async def _set_settings(self, request: web.Request) -> web.Response:
+        fields = ("unit", "season", "min_heating_set_point", "max_heating_set_point", "sensor_influence", "climatic_curve")
+
+        def apply(box, form):
+            thermostat = self._box_thermostat(box, request)
+            return lambda: thermostat.update({x: form[x] for x in fields if x in form})
+        return await self._put(request, apply)
+
+    async def _set_program(self, request: web.Request) -> web.Response:
+        def apply(box, form):
+            thermostat = self._box_thermostat(box, request)
+            program = json.loads(form["program"])
+            # A full week, or a mapping of the days to change
+            days = enumerate(program) if isinstance(program, list) else program.items()
+            days = {int(day): [int(x) for x in marks] for day, marks in days}
+
+            def changes():
+                for day, marks in days.items():
+                    thermostat["program"][day] = marks
+            return changes
+        return await self._put(request, apply)
+
+    def _set_boiler_field(self, field: str, form_field: str):
+        async def handler(request: web.Request) -> web.Response:
+            def apply(box, form):
+                return lambda: box["boiler"].update({field: form[form_field]})
+            return await self._put(request, apply)
+        return handler
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    simulator = Simulator(
+        boxes=args.boxes,
+        thermostats=args.thermostats,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        apply_delay=args.apply_delay,
+        seed=args.seed,
+    )
+    url = await simulator.start(args.host, args.port)
+    print(f"Serving {args.boxes} x {args.thermostats} thermostats at {url}")
+    started = time.monotonic()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print(f"{sum(simulator.requests.values())} requests in {time.monotonic() - started:.0f}s")
+        for route, count in simulator.requests.most_common():
+            print(f"{count:8} {route}")
+        await simulator.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--boxes", type=int, default=1)
+    parser.add_argument("--thermostats", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--apply-delay", type=float, default=0.0, help="seconds until writes are reported")
+    parser.add_argument("--seed", type=int)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
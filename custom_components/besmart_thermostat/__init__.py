@@ -2,64 +2,217 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from functools import partial
 from http import HTTPStatus
 from requests import HTTPError
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import (
-    Platform,
-    CONF_USERNAME,
-    CONF_PASSWORD,
-)
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.device_registry import DeviceEntry
-
-from .const import PLATFORMS
+from homeassistant.helpers.typing import ConfigType
+
+from .account import BesmartAccount, async_acquire_account, async_release_account
+from .const import (
+    CONF_DISCOVERY_CONCURRENCY,
+    DEFAULT_DISCOVERY_CONCURRENCY,
+    DISCOVERY_RETRY_INTERVAL,
+    DISCOVERY_TIMEOUT,
+    DOMAIN,
+    MAX_ERROR_SCAN_INTERVAL,
+    PLATFORMS,
+)
 from .device import BesmartInterfaceDevice
 from .api import BesmartClient
+from .store import BesmartStore
+from .exceptions import BesmartAuthError
+from .models import WifiBoxSnapshot
+from .services import async_setup_services
 
 type BesmartConfigEntry = ConfigEntry[BesmartClient]
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the besmart_thermostat services."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: BesmartConfigEntry,
 ) -> bool:
     """Set up besmart_thermostat from a config entry."""
 
-    # 1. Create API instance
+    # 1. Get the API instance, shared by all entries of the same account
     besmart_config = entry.options
-    client = BesmartClient(hass, besmart_config[CONF_USERNAME], besmart_config[CONF_PASSWORD])
+    account = async_acquire_account(hass, entry)
+    entry.async_on_unload(partial(async_release_account, hass, account, entry.entry_id))
+    client = account.client
 
-    # 2. Validate the API connection (and authentication)
-    try:
-        wifi_boxes = await client.login()
-    except HTTPError as ex:
-        if ex.response.status_code == HTTPStatus.UNAUTHORIZED:
-            raise ConfigEntryAuthFailed("Invalid credentials.") from ex
-        raise ConfigEntryNotReady from ex
-    except Exception as ex:
-        raise ConfigEntryNotReady from ex
-
-    # 3. Store an API object for your platforms to access
+    # 2. Store an API object for your platforms to access
     entry.runtime_data = client
 
-    # 4. Register BeSMART Controller devices for all wifi boxes
+    store = BesmartStore(hass, entry.entry_id)
+    await store.async_load()
+    if store.session is not None:
+        # Skip the login until the cloud rejects the stored session
+        account.async_restore_session(store.session)
+
+    if store.snapshots:
+        # 3. Use the WiFi boxes found last time, the cloud is checked in the background
+        wifi_boxes = store.wifi_boxes
+    else:
+        # 3. Validate the API connection (and authentication)
+        wifi_boxes = await _async_login(account)
+
+    # 4. Register BeSMART Controller devices for all wifi boxes, from their stored data or the cloud
+    semaphore = asyncio.Semaphore(
+        int(besmart_config.get(CONF_DISCOVERY_CONCURRENCY, DEFAULT_DISCOVERY_CONCURRENCY))
+    )
+    results = await asyncio.gather(
+        *(
+            _async_setup_wifi_box(hass, entry, account, wifi_box, store.snapshots.get(wifi_box), semaphore)
+            for wifi_box in wifi_boxes
+        ),
+        return_exceptions=True,
+    )
+
     interface_devices = []
-    for wifi_box in wifi_boxes:
-        devices = await client.devices(wifi_box)
-        interface_devices.append(BesmartInterfaceDevice(hass, entry, wifi_box, devices))
+    skipped = []
+    for wifi_box, result in zip(wifi_boxes, results):
+        if isinstance(result, BaseException):
+            _LOGGER.warning("Skipping WiFi box %s for now: %s", wifi_box, repr(result))
+            skipped.append(wifi_box)
+        else:
+            interface_devices.append(result)
+
+    if wifi_boxes and not interface_devices:
+        raise ConfigEntryNotReady("Unable to set up any WiFi box.")
+
     entry.interface_devices = interface_devices
+    for unsub in store.async_track(client, wifi_boxes, [x.coordinator for x in interface_devices]):
+        entry.async_on_unload(unsub)
+    entry.async_on_unload(store.async_flush)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_config_entry_update_listener))
 
+    if any(x.coordinator.data.stale for x in interface_devices):
+        entry.async_create_background_task(
+            hass,
+            _async_refresh_stale(hass, entry, account, store, interface_devices),
+            f"{DOMAIN} refresh {entry.title}",
+        )
+
+    if skipped:
+        entry.async_create_background_task(
+            hass,
+            _async_retry_wifi_boxes(hass, entry, account, skipped),
+            f"{DOMAIN} retry {entry.title}",
+        )
+
     return True
 
 
+async def _async_login(account: BesmartAccount) -> list[str]:
+    """Log into the account, returning its WiFi boxes."""
+    try:
+        return await account.async_login()
+    except BesmartAuthError as ex:
+        raise ConfigEntryAuthFailed("Invalid credentials.") from ex
+    except HTTPError as ex:
+        if ex.response.status_code == HTTPStatus.UNAUTHORIZED:
+            raise ConfigEntryAuthFailed("Invalid credentials.") from ex
+        raise ConfigEntryNotReady from ex
+    except Exception as ex:
+        raise ConfigEntryNotReady from ex
+
+
+async def _async_refresh_stale(
+    hass: HomeAssistant,
+    entry: BesmartConfigEntry,
+    account: BesmartAccount,
+    store: BesmartStore,
+    interface_devices: list[BesmartInterfaceDevice],
+) -> None:
+    """Replace the stored data entities were set up with by data from the cloud."""
+    try:
+        await _async_login(account)
+    except ConfigEntryAuthFailed:
+        entry.async_start_reauth(hass)
+        return
+    except ConfigEntryNotReady as ex:
+        # The coordinators keep trying on their own schedule
+        _LOGGER.warning("Unable to log into BeSMART, serving stored data: %s", repr(ex.__cause__))
+        return
+
+    await asyncio.gather(
+        *(
+            device.coordinator.async_refresh()
+            for device in interface_devices
+            if device.coordinator.data.stale
+        )
+    )
+
+    # A login, also one replacing a rejected stored session, may report other WiFi boxes
+    wifi_boxes = [str(x) for x in account.client.wifi_boxes or ()]
+    if wifi_boxes and set(wifi_boxes) != set(store.wifi_boxes):
+        _LOGGER.info("WiFi boxes of %s changed, reloading", entry.title)
+        store.wifi_boxes = wifi_boxes
+        store.async_schedule_save()
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+
+
+async def _async_retry_wifi_boxes(
+    hass: HomeAssistant,
+    entry: BesmartConfigEntry,
+    account: BesmartAccount,
+    wifi_boxes: list[str],
+) -> None:
+    """Fetch WiFi boxes skipped during setup until one answers, then reload to add its devices."""
+    delay = DISCOVERY_RETRY_INTERVAL
+    while True:
+        await asyncio.sleep(delay.total_seconds())
+        for wifi_box in wifi_boxes:
+            coordinator = account.get_coordinator(hass, wifi_box)
+            try:
+                async with asyncio.timeout(DISCOVERY_TIMEOUT):
+                    await coordinator.async_ensure_data()
+            except (ConfigEntryNotReady, TimeoutError) as ex:
+                _LOGGER.debug("WiFi box %s still unavailable: %s", wifi_box, repr(ex))
+                continue
+            _LOGGER.info("WiFi box %s is available again, reloading %s", wifi_box, entry.title)
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+            return
+        delay = min(delay * 2, MAX_ERROR_SCAN_INTERVAL)
+
+
+async def _async_setup_wifi_box(
+    hass: HomeAssistant,
+    entry: BesmartConfigEntry,
+    account: BesmartAccount,
+    wifi_box: str,
+    snapshot: WifiBoxSnapshot | None,
+    semaphore: asyncio.Semaphore,
+) -> BesmartInterfaceDevice:
+    """Discover devices of a wifi box from its stored snapshot, or fetch their initial data."""
+    coordinator = account.get_coordinator(hass, wifi_box)
+    if snapshot is not None:
+        coordinator.async_restore(snapshot)
+        return BesmartInterfaceDevice(hass, entry, wifi_box, coordinator)
+    async with semaphore, asyncio.timeout(DISCOVERY_TIMEOUT):
+        await coordinator.async_ensure_data()
+        return BesmartInterfaceDevice(hass, entry, wifi_box, coordinator)
+
+
 async def async_config_entry_update_listener(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -77,6 +230,14 @@ async def async_remove_config_entry_device(
     return True
 
 
+async def async_remove_entry(
+    hass: HomeAssistant,
+    entry: BesmartConfigEntry,
+) -> None:
+    """Remove the stored data of a config entry."""
+    await BesmartStore(hass, entry.entry_id).async_remove()
+
+
 async def async_unload_entry(
     hass: HomeAssistant,
     entry: BesmartConfigEntry,
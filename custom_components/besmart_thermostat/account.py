@@ -0,0 +1,196 @@
+"""BeSMART accounts shared by config entries."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_USERNAME,
+    CONF_VERIFY_SSL,
+    EVENT_HOMEASSISTANT_CLOSE,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+from .api import BesmartClient
+from .const import (
+    CONF_DETAIL_INTERVAL,
+    CONF_REQUEST_RATE,
+    CONF_SETTINGS_INTERVAL,
+    DEFAULT_DETAIL_INTERVAL,
+    DEFAULT_REQUEST_RATE,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SETTINGS_INTERVAL,
+    DEFAULT_VERIFY_SSL,
+    DOMAIN,
+)
+from .coordinator import BesmartCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class BesmartAccount:
+    """A BeSMART account shared by all config entries logging into it.
+
+    The entries share one client (login, cache and request budget) and one
+    coordinator per WiFi box, so that each box is polled once.
+    """
+
+    username: str
+    client: BesmartClient
+    # Options of the entry the account settings were taken from
+    options: dict = field(default_factory=dict)
+    scan_interval: timedelta = DEFAULT_SCAN_INTERVAL
+    detail_interval: timedelta = DEFAULT_DETAIL_INTERVAL
+    coordinators: dict[str, BesmartCoordinator] = field(default_factory=dict)
+    entries: set[str] = field(default_factory=set)
+    _unsub_close: CALLBACK_TYPE | None = None
+
+    async def async_login(self) -> list[str]:
+        """Log in unless another entry did already, returning the WiFi boxes."""
+        return await self.client.async_ensure_login()
+
+    @callback
+    def async_restore_session(self, session: dict) -> None:
+        """Reuse a stored session of the account unless another entry logged in already.
+
+        The client ignores sessions stored with other credentials.
+        """
+        self.client.restore_session(session)
+
+    def get_coordinator(self, hass: HomeAssistant, wifi_box: str) -> BesmartCoordinator:
+        """Return the coordinator of a WiFi box, creating it if needed.
+
+        Coordinators are shut down with the last entry of the account, their
+        scheduled refreshes are cancelled on stop anyway.
+        """
+        coordinator = self.coordinators.get(wifi_box)
+        if coordinator is None:
+            coordinator = BesmartCoordinator(
+                hass, None, self.client, wifi_box, self.scan_interval, self.detail_interval
+            )
+            self.coordinators[wifi_box] = coordinator
+        return coordinator
+
+    @callback
+    def async_close_on_stop(self, hass: HomeAssistant) -> None:
+        """Close the connections of the client when Home Assistant stops.
+
+        Config entries are not unloaded on stop, so the account may never be
+        shut down otherwise.
+        """
+
+        async def _async_close(event: Event) -> None:
+            self._unsub_close = None
+            await self.client.async_close()
+
+        self._unsub_close = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+
+    async def async_shutdown(self) -> None:
+        """Stop polling all WiFi boxes and close the connections of the client."""
+        if self._unsub_close is not None:
+            self._unsub_close()
+            self._unsub_close = None
+        for coordinator in self.coordinators.values():
+            await coordinator.async_shutdown()
+        self.coordinators.clear()
+        await self.client.async_close()
+
+
+def _account_options(entry: ConfigEntry) -> dict:
+    """Return the options of a config entry that apply to its whole account."""
+    options = entry.options
+    return {
+        CONF_PASSWORD: options[CONF_PASSWORD],
+        CONF_REQUEST_RATE: int(options.get(CONF_REQUEST_RATE, DEFAULT_REQUEST_RATE)),
+        CONF_VERIFY_SSL: options.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL),
+        CONF_SCAN_INTERVAL: timedelta(
+            seconds=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.total_seconds())
+        ),
+        CONF_DETAIL_INTERVAL: timedelta(
+            minutes=options.get(CONF_DETAIL_INTERVAL, DEFAULT_DETAIL_INTERVAL.total_seconds() / 60)
+        ),
+        CONF_SETTINGS_INTERVAL: timedelta(
+            minutes=options.get(CONF_SETTINGS_INTERVAL, DEFAULT_SETTINGS_INTERVAL.total_seconds() / 60)
+        ),
+    }
+
+
+def _create_account(hass: HomeAssistant, username: str, options: dict) -> BesmartAccount:
+    return BesmartAccount(
+        username,
+        BesmartClient(
+            hass,
+            username,
+            options[CONF_PASSWORD],
+            request_rate=options[CONF_REQUEST_RATE],
+            verify_ssl=options[CONF_VERIFY_SSL],
+            settings_ttl=options[CONF_SETTINGS_INTERVAL].total_seconds(),
+        ),
+        options,
+        scan_interval=options[CONF_SCAN_INTERVAL],
+        detail_interval=options[CONF_DETAIL_INTERVAL],
+    )
+
+
+def _settings_entry(hass: HomeAssistant, entry: ConfigEntry, username: str) -> ConfigEntry:
+    """Return the most recently changed enabled entry of an account."""
+    entries = [
+        x
+        for x in hass.config_entries.async_entries(DOMAIN)
+        if x.disabled_by is None and x.options.get(CONF_USERNAME) == username
+    ]
+    return max(entries, key=lambda x: x.modified_at, default=entry)
+
+
+@callback
+def async_acquire_account(hass: HomeAssistant, entry: ConfigEntry) -> BesmartAccount:
+    """Return the account of a config entry, shared with other entries of the same username.
+
+    The password, request budget, TLS verification and polling intervals
+    apply to the whole account. They are taken from its most recently changed
+    entry, whichever entry sets up first. When they change, e.g. with an entry
+    reloaded by the options flow, the account is created again with them and
+    the other entries are reloaded to move over.
+    """
+    accounts: dict[str, BesmartAccount] = hass.data.setdefault(DOMAIN, {})
+    username = entry.options[CONF_USERNAME]
+    source = _settings_entry(hass, entry, username)
+    options = _account_options(source)
+    if source is not entry and _account_options(entry) != options:
+        _LOGGER.warning(
+            "Options of %s differ from those of %s, most recently changed entry of account %s, which are used"
+            " instead. Change them to match in all entries",
+            entry.title,
+            source.title,
+            username,
+        )
+    account = accounts.get(username)
+    if account is not None and account.options != options:
+        _LOGGER.info("Options of account %s changed, setting it up again", username)
+        for entry_id in account.entries - {entry.entry_id}:
+            hass.config_entries.async_schedule_reload(entry_id)
+        account = None
+    if account is None:
+        account = accounts[username] = _create_account(hass, username, options)
+        account.async_close_on_stop(hass)
+    elif entry.entry_id not in account.entries:
+        _LOGGER.debug("Sharing account %s with %s", username, entry.title)
+    account.entries.add(entry.entry_id)
+    return account
+
+
+async def async_release_account(hass: HomeAssistant, account: BesmartAccount, entry_id: str) -> None:
+    """Release the account of a config entry, shutting it down with its last entry."""
+    account.entries.discard(entry_id)
+    if account.entries:
+        return
+    accounts: dict[str, BesmartAccount] = hass.data.get(DOMAIN, {})
+    if accounts.get(account.username) is account:
+        del accounts[account.username]
+    await account.async_shutdown()
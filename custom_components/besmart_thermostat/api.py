@@ -1,8 +1,45 @@
 import logging
 import asyncio
+import hashlib
+import json
+import random
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+import aiohttp
+
+from aiohttp.hdrs import ACCEPT_ENCODING, USER_AGENT
 
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util.json import json_loads
+from homeassistant.util.ssl import client_context, client_context_no_verify
+
+from .circuit_breaker import CircuitBreaker
+from .exceptions import (
+    BesmartAuthError,
+    BesmartError,
+    BesmartPayloadError,
+    BesmartRequestError,
+    BesmartServerError,
+    BesmartTimeoutError,
+)
+from .metrics import ClientMetrics
+from .models import (
+    BoilerSnapshot,
+    ThermostatSettings,
+    ThermostatSnapshot,
+    WifiBoxSnapshot,
+    parse_boiler,
+    parse_program_day,
+    parse_thermostat,
+    parse_thermostat_settings,
+    parse_wifi_box,
+)
+from .program import DAYS, WeeklyProgram
+from .scheduler import RequestPriority, RequestScheduler, RequestSuperseded
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,7 +55,7 @@ class BesmartClient(object):
     GET_WIFI_BOX_DATA = "Android/Wifi_boxes/data/user_id/{user}/wifi_box_id/{wifi_box}/token/{token}"
     
     GET_THERMOSTAT_DATA = "Android/Thermostats/data/user_id/{user}/wifi_box_id/{wifi_box}/token/{token}/thermostat_id/{thermostat}"
-    GET_THERMOSTAT_PROGRAM = "Android/thermostats/program/user_id/{0}/wifi_box_id/{1}/thermostat_id/{2}/day/{3}/token/{4}"
+    GET_THERMOSTAT_PROGRAM = "Android/thermostats/program/user_id/{user}/wifi_box_id/{wifi_box}/thermostat_id/{thermostat}/day/{day}/token/{token}"
     GET_THERMOSTAT_SETTINGS = "Android/thermostats/setting/user_id/{user}/wifi_box_id/{wifi_box}/token/{token}/thermostat_id/{thermostat}"
     SET_THERMOSTAT_TEMP = "Android/Thermostats/temperature"
     SET_THERMOSTAT_ADVANCE = "Android/Thermostats/advance"
@@ -31,19 +68,93 @@ class BesmartClient(object):
     SET_BOILER_MODE = "Android/Boilers/work_mode"
     SET_BOILER_DHW_TEMP = "Android/Boilers/dhw_target_temp"
 
+    ERROR_UNAUTHORIZED = "6"
+
+    # Retries of failed GET requests (timeouts and server errors)
+    RETRIES = 2
+    RETRY_BACKOFF = 1.0
+    RETRY_MAX_BACKOFF = 8.0
+
+    # Requests sent right away before the request rate applies
+    REQUEST_BURST = 20
+
+    # Connections to the API, kept open between polls
+    POOL_SIZE = 8
+    KEEPALIVE_TIMEOUT = 90
+    # Seconds a resolved address of the API is reused
+    DNS_CACHE_TTL = 300
+
+    # Seconds a response stays in the read cache, per endpoint
+    CACHE_TTL = {
+        GET_WIFI_BOX_DATA: 10,
+        GET_THERMOSTAT_DATA: 10,
+        GET_BOILER_DATA: 10,
+        GET_THERMOSTAT_SETTINGS: 300,
+        GET_THERMOSTAT_PROGRAM: 300,
+    }
+
     def __init__(
         self,
         hass: HomeAssistant,
         username: str,
-        password: str
+        password: str,
+        cache: bool = True,
+        request_rate: float = 60,
+        verify_ssl: bool = True,
+        settings_ttl: float | None = None,
     ):
         """Initialize the thermostat."""
         self._username = username
         self._password = password
         self._lastupdate = None
         self._user = None
+        self.wifi_boxes: list[str] | None = None
+        self._login_lock = asyncio.Lock()
         self._timeout = 30
-        self._session = async_get_clientsession(hass, verify_ssl=False)
+        self._session = self._create_session(verify_ssl)
+        self._breaker = CircuitBreaker()
+        self.metrics = ClientMetrics()
+        self.scheduler = RequestScheduler(request_rate, self.REQUEST_BURST)
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._cache_ttl = dict(self.CACHE_TTL) if cache else {}
+        if cache and settings_ttl is not None:
+            # Settings rarely change, and changes made elsewhere show in the WiFi box data
+            self._cache_ttl[self.GET_THERMOSTAT_SETTINGS] = settings_ttl
+        self._cache: dict[tuple, tuple[float, dict]] = {}
+        self._cache_epoch = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._snapshots: dict[tuple, tuple[Any, Any]] = {}
+        self.parse_applied = 0
+        self.parse_skipped = 0
+        self._programs: dict[tuple[str, str], WeeklyProgram] = {}
+
+    def _create_session(self, verify_ssl: bool) -> aiohttp.ClientSession:
+        """Return a session of the client, with connections tuned for frequent polls of a single host."""
+        connector = aiohttp.TCPConnector(
+            limit=self.POOL_SIZE,
+            limit_per_host=self.POOL_SIZE,
+            keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=self.DNS_CACHE_TTL,
+            ssl=client_context() if verify_ssl else client_context_no_verify(),
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers={USER_AGENT: SERVER_SOFTWARE, ACCEPT_ENCODING: "gzip, deflate"},
+        )
+
+    async def async_close(self) -> None:
+        """Close the connections of the client, cancelling reads still in flight."""
+        # Shared reads outlive their callers, they would fail on the closed session
+        for task in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+        await self._session.close()
+
+    @property
+    def circuit_state(self) -> str:
+        """Return the state of the circuit breaker."""
+        return self._breaker.state
 
     def _fahToCent(self, temp):
         return str(round((temp - 32.0) / 1.8, 1))
@@ -57,292 +168,487 @@ class BesmartClient(object):
                 username=self._username,
                 password=self._password,
             )
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.get(url)
-
-            data = await res.json()
-            # TODO: check status
-            error_code = data.get("error_code")
-
-            if error_code == "6":
-                raise asyncio.web.HTTPUnauthorized()
-
-            if not res.ok:
-                res.raise_for_status()
+            try:
+                # Every other request waits for the login, let it skip the queue
+                data = await self._send(lambda: self._session.get(url), self.LOGIN, priority=RequestPriority.WRITE)
+            except BesmartAuthError as ex:
+                raise BesmartAuthError("Invalid credentials.") from ex
 
             message = data.get("message")
             self._user = message.get("user")
             _LOGGER.debug("login: {}".format(message))
-            return list(map(lambda x: x.get("id"), message.get("wifi_box")))
+            self.wifi_boxes = list(map(lambda x: x.get("id"), message.get("wifi_box")))
+            return self.wifi_boxes
         except Exception as ex:
             _LOGGER.warning(ex)
             self._user = None
             raise
 
-    async def devices(self, wifi_box: str):
-        try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.get(
-                    self.BASE_URL + self.GET_WIFI_BOX_DATA.format(
-                        user=self._user.get("id"),
-                        wifi_box=wifi_box,
-                        token=self.TOKEN,
-                    ),
-                )
-
-            data = await res.json()
-            # TODO: check status
-            
-            if not res.ok:
-                res.raise_for_status()
+    async def async_ensure_login(self) -> list[str]:
+        """Log in unless logged in already or a session was restored, returning the WiFi boxes.
 
-            message = data.get("message")
-            boiler = message.get("boiler")
-            thermostats = list(
-                filter(lambda x: x.get("id") != None, message.get("thermostat"))
-            )
-            _LOGGER.debug("boiler: {}".format(boiler))
-            _LOGGER.debug("thermostats: {}".format(thermostats))
-            return { "boiler": boiler, "thermostats": thermostats }
-        except Exception as ex:
-            _LOGGER.warning(ex)
-            return None
-
-    async def thermostat(self, wifi_box: str, thermostat: str):
-        try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.get(
-                    self.BASE_URL + self.GET_THERMOSTAT_DATA.format(
-                        user=self._user.get("id"),
-                        wifi_box=wifi_box,
-                        token=self.TOKEN,
-                        thermostat=thermostat,
-                    ),
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
+        Shares the login of concurrent requests logging in again.
+        """
+        await self._ensure_login()
+        return self.wifi_boxes
 
-            message = data.get("message")
-            _LOGGER.debug("thermostat data: {}".format(message))
-            return message
-        except Exception as ex:
-            _LOGGER.warning(ex)
+    @property
+    def session(self) -> dict | None:
+        """Return the identity of the logged in user, to restore it later."""
+        if not self._user:
             return None
+        return {
+            "username": self._username,
+            "credentials": self._credentials,
+            "user_id": self._user.get("id"),
+            "wifi_boxes": self.wifi_boxes,
+        }
+
+    @property
+    def _credentials(self) -> str:
+        """Return a digest of the username and password, telling whether a stored session used them."""
+        return hashlib.sha256(f"{self._username}\0{self._password}".encode()).hexdigest()
+
+    def restore_session(self, session: dict) -> list[str] | None:
+        """Reuse the identity of an earlier login instead of logging in.
+
+        The client only logs in again when the cloud rejects the session.
+        Sessions of other credentials, e.g. before the password was changed,
+        are ignored.
+        """
+        if session.get("credentials") != self._credentials:
+            _LOGGER.debug("ignoring session stored with other credentials")
+        elif not self._user:
+            self._user = {"id": session["user_id"]}
+            self.wifi_boxes = list(session["wifi_boxes"])
+        return self.wifi_boxes
+
+    async def devices(self, wifi_box: str) -> WifiBoxSnapshot:
+        devices = await self._get_snapshot(parse_wifi_box, self.GET_WIFI_BOX_DATA, wifi_box=wifi_box)
+        _LOGGER.debug("boiler: {}".format(devices.boiler))
+        _LOGGER.debug("thermostats: {}".format(devices.thermostats))
+        return devices
+
+    async def thermostat(self, wifi_box: str, thermostat: str) -> ThermostatSnapshot:
+        data = await self._get_snapshot(
+            partial(parse_thermostat, thermostat_id=thermostat),
+            self.GET_THERMOSTAT_DATA,
+            wifi_box=wifi_box,
+            thermostat=thermostat,
+        )
+        _LOGGER.debug("thermostat data: {}".format(data))
+        return data
+
+    async def thermostatSettings(self, wifi_box: str, thermostat: str) -> ThermostatSettings:
+        settings = await self._get_snapshot(
+            parse_thermostat_settings,
+            self.GET_THERMOSTAT_SETTINGS,
+            wifi_box=wifi_box,
+            thermostat=thermostat,
+        )
+        _LOGGER.debug("thermostat settings: {}".format(settings))
+        return settings
+
+    def expire_settings(self, wifi_box: str, thermostat: str) -> None:
+        """Drop the cached settings of a thermostat, e.g. when its season changed elsewhere."""
+        self._invalidate(self.GET_THERMOSTAT_SETTINGS, wifi_box=wifi_box, thermostat=thermostat)
+
+    async def thermostatProgram(
+        self,
+        wifi_box: str,
+        thermostat: str,
+        embedded: WeeklyProgram | None = None,
+    ) -> WeeklyProgram:
+        """Return the weekly program of a thermostat.
+
+        The cached program is returned while it matches the program embedded in
+        the thermostat data, if known. The thermostat data carries the whole
+        week, so a newer embedded program replaces the cached one as is; the
+        days are only read when there is neither.
+        """
+        key = (str(wifi_box), str(thermostat))
+        program = self._programs.get(key)
+        if program is not None and (embedded is None or program == embedded):
+            return program
+
+        if embedded is None:
+            days = dict(
+                parse_program_day(message)
+                for message in await asyncio.gather(*(
+                    self._get(self.GET_THERMOSTAT_PROGRAM, wifi_box=wifi_box, thermostat=thermostat, day=day)
+                    for day in range(DAYS)
+                ))
+            )
+            try:
+                embedded = WeeklyProgram.from_days([days[day] for day in range(DAYS)])
+            except (KeyError, ValueError) as ex:
+                raise BesmartPayloadError(f"Invalid program: {ex}") from ex
 
-    async def thermostatSettings(self, wifi_box: str, thermostat: str):
-        try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.get(
-                    self.BASE_URL + self.GET_THERMOSTAT_SETTINGS.format(
-                        user=self._user.get("id"),
-                        wifi_box=wifi_box,
-                        token=self.TOKEN,
-                        thermostat=thermostat,
-                    ),
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
+        _LOGGER.debug("thermostat program: {}".format(embedded.marks))
+        self._programs[key] = embedded
+        return embedded
 
-            message = data.get("message")
-            _LOGGER.debug("thermostat settings: {}".format(message))
-            return message
-        except Exception as ex:
-            _LOGGER.warning(ex)
-            return None
+    async def setThermostatProgram(
+        self,
+        wifi_box: str,
+        thermostat: str,
+        program: WeeklyProgram,
+        current: WeeklyProgram,
+    ):
+        """Write a weekly program, uploading only the days differing from the current one.
+
+        The days are sent as a JSON object mapping their index (Sunday first)
+        to their 48 marks. The cached program is replaced once the write
+        succeeded and dropped when it failed.
+        """
+        key = (str(wifi_box), str(thermostat))
+        days = current.changed_days(program)
+        if not days:
+            return True
+        written = await self._write(
+            self.SET_THERMOSTAT_PROGRAM,
+            {
+                "wifi_box_id": wifi_box,
+                "thermostat_id": thermostat,
+                "program": json.dumps({day: [int(x) for x in program.day(day)] for day in days}),
+            },
+            *(
+                (self.GET_THERMOSTAT_PROGRAM, {"wifi_box": wifi_box, "thermostat": thermostat, "day": day})
+                for day in days
+            ),
+            *self._thermostat_reads(wifi_box, thermostat),
+        )
+        if written:
+            self._programs[key] = program
+        else:
+            self._programs.pop(key, None)
+        return written
 
     async def setThermostatMode(self, wifi_box: str, thermostat: str, mode: str):
-        try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.put(
-                    self.BASE_URL + self.SET_THERMOSTAT_MODE,
-                    data={
-                        "mode": mode,
-                        "wifi_box_id": wifi_box,
-                        "user_id": self._user.get("id"),
-                        "thermostat_id": thermostat,
-                        "id": self._user.get("id"),
-                        "token": self.TOKEN,
-                    }
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
-
-            _LOGGER.debug("thermostat set temp: {}".format(data))
-            return True
-        except Exception as ex:
-            _LOGGER.warning(ex)
-            return False
+        return await self._write(
+            self.SET_THERMOSTAT_MODE,
+            {
+                "mode": mode,
+                "wifi_box_id": wifi_box,
+                "thermostat_id": thermostat,
+            },
+            *self._thermostat_reads(wifi_box, thermostat),
+        )
 
     async def setThermostatTemp(self, wifi_box: str, thermostat: str, temp: float, tempMode: str):
-        try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.put(
-                    self.BASE_URL + self.SET_THERMOSTAT_TEMP,
-                    data={
-                        "fraction_part": round(temp % 1 * 10),
-                        "integer_part": int(temp),
-                        "temp_mode": tempMode,
-                        "wifi_box_id": wifi_box,
-                        "user_id": self._user.get("id"),
-                        "thermostat_id": thermostat,
-                        "id": self._user.get("id"),
-                        "token": self.TOKEN,
-                    }
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
-
-            _LOGGER.debug("thermostat set temp: {}".format(data))
-            return True
-        except Exception as ex:
-            _LOGGER.warning(ex)
-            return False
+        return await self._write(
+            self.SET_THERMOSTAT_TEMP,
+            {
+                "fraction_part": round(temp % 1 * 10),
+                "integer_part": int(temp),
+                "temp_mode": tempMode,
+                "wifi_box_id": wifi_box,
+                "thermostat_id": thermostat,
+            },
+            *self._thermostat_reads(wifi_box, thermostat),
+        )
 
     async def setThermostatSeason(self, wifi_box: str, thermostat: str, season: str):
         try:
-            await self._ensure_login()
-
+            # All settings are written at once, the cached ones fill in the rest
             settings = await self.thermostatSettings(wifi_box, thermostat)
-            settings["season"] = season
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.put(
-                    self.BASE_URL + self.SET_THERMOSTAT_TEMP,
-                    data={
-                        "unit": settings.get("unit"),
-                        "season": season,
-                        "min_heating_set_point": settings.get("min_heating_set_point"),
-                        "max_heating_set_point": settings.get("max_heating_set_point"),
-                        "sensor_influence": settings.get("sensor_influence"),
-                        "climatic_curve": settings.get("climatic_curve"),
-                        "wifi_box_id": wifi_box,
-                        "user_id": self._user.get("id"),
-                        "thermostat_id": thermostat,
-                        "id": self._user.get("id"),
-                        "token": self.TOKEN,
-                    }
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
-
-            _LOGGER.debug("thermostat set temp: {}".format(data))
-            return True
         except Exception as ex:
             _LOGGER.warning(ex)
             return False
 
-    async def boiler(self, wifi_box: str):
-        try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.get(
-                    self.BASE_URL + self.GET_BOILER_DATA.format(
-                        user=self._user.get("id"),
-                        wifi_box=wifi_box,
-                        token=self.TOKEN,
-                    ),
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
-
-            message = data.get("message")
-            _LOGGER.debug("boiler data: {}".format(message))
-            return message
-        except Exception as ex:
-            _LOGGER.warning(ex)
-            return None
+        written = await self._write(
+            self.SET_THERMOSTAT_SETTINGS,
+            {
+                **settings.as_fields(),
+                "season": season,
+                "wifi_box_id": wifi_box,
+                "thermostat_id": thermostat,
+            },
+            *self._thermostat_reads(wifi_box, thermostat),
+        )
+        if written:
+            # Keep the cached settings, the next change needs no read
+            self._update_cached(self.GET_THERMOSTAT_SETTINGS, {"season": season}, wifi_box=wifi_box, thermostat=thermostat)
+        else:
+            self._invalidate(self.GET_THERMOSTAT_SETTINGS, wifi_box=wifi_box, thermostat=thermostat)
+        return written
+
+    async def boiler(self, wifi_box: str) -> BoilerSnapshot:
+        data = await self._get_snapshot(parse_boiler, self.GET_BOILER_DATA, wifi_box=wifi_box)
+        _LOGGER.debug("boiler data: {}".format(data))
+        return data
 
     async def setBoilerMode(self, wifi_box: str, mode: str):
-        try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.put(
-                    self.BASE_URL + self.SET_BOILER_MODE,
-                    data={
-                        "mode": mode,
-                        "wifi_box_id": wifi_box,
-                        "user_id": self._user.get("id"),
-                        "id": self._user.get("id"),
-                        "token": self.TOKEN,
-                    }
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
-
-            _LOGGER.debug("boiler set temp: {}".format(data))
-            return True
-        except Exception as ex:
-            _LOGGER.warning(ex)
-            return False
+        return await self._write(
+            self.SET_BOILER_MODE,
+            {
+                "mode": mode,
+                "wifi_box_id": wifi_box,
+            },
+            *self._boiler_reads(wifi_box),
+        )
 
     async def setBoilerTemp(self, wifi_box: str, temp: float):
+        return await self._write(
+            self.SET_BOILER_DHW_TEMP,
+            {
+                "temp": int(temp),
+                "wifi_box_id": wifi_box,
+            },
+            *self._boiler_reads(wifi_box),
+        )
+
+    async def _write(self, endpoint: str, fields: dict, *reads: tuple[str, dict]) -> bool:
+        """Send a write, returning whether it succeeded.
+
+        The cached responses of the reads it affects are dropped either way:
+        the write may have been applied even if its request failed.
+        """
         try:
-            await self._ensure_login()
-
-            async with asyncio.timeout(self._timeout):
-                res = await self._session.put(
-                    self.BASE_URL + self.SET_BOILER_DHW_TEMP,
-                    data={
-                        "temp": int(temp),
-                        "wifi_box_id": wifi_box,
-                        "user_id": self._user.get("id"),
-                        "id": self._user.get("id"),
-                        "token": self.TOKEN,
-                    }
-                )
-            
-            data = await res.json()
-            # TODO: check status
-
-            if not res.ok:
-                res.raise_for_status()
-
-            _LOGGER.debug("boiler set temp: {}".format(data))
+            data = await self._put(endpoint, fields)
+            _LOGGER.debug("{}: {}".format(endpoint, data))
             return True
         except Exception as ex:
             _LOGGER.warning(ex)
             return False
+        finally:
+            for read, params in reads:
+                self._invalidate(read, **params)
+
+    def _thermostat_reads(self, wifi_box: str, thermostat: str) -> tuple[tuple[str, dict], ...]:
+        return (
+            (self.GET_THERMOSTAT_DATA, {"wifi_box": wifi_box, "thermostat": thermostat}),
+            (self.GET_WIFI_BOX_DATA, {"wifi_box": wifi_box}),
+        )
+
+    def _boiler_reads(self, wifi_box: str) -> tuple[tuple[str, dict], ...]:
+        return (
+            (self.GET_BOILER_DATA, {"wifi_box": wifi_box}),
+            (self.GET_WIFI_BOX_DATA, {"wifi_box": wifi_box}),
+        )
+
+    def _key(self, endpoint: str, params: dict) -> tuple:
+        return (endpoint, *sorted(params.items()))
+
+    def _invalidate(self, endpoint: str, **params):
+        """Drop a cached response, e.g. after a write affecting it."""
+        key = self._key(endpoint, params)
+        self._cache.pop(key, None)
+        self._inflight.pop(key, None)
+        self._cache_epoch += 1
+        # Reads queued before the write would return outdated data
+        self.scheduler.supersede(key)
+
+    def _update_cached(self, endpoint: str, changes: dict, **params):
+        """Apply a write to a cached response instead of dropping it."""
+        key = self._key(endpoint, params)
+        cached = self._cache.get(key)
+        self._invalidate(endpoint, **params)
+        if cached is not None:
+            expires, message = cached
+            self._cache[key] = (expires, {**message, **changes})
+
+    async def _get(self, endpoint: str, **params):
+        """Fetch an endpoint, sharing a single request between concurrent callers."""
+        key = self._key(endpoint, params)
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires, message = cached
+            if expires > time.monotonic():
+                self.cache_hits += 1
+                return message
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            if endpoint in self._cache_ttl:
+                self.cache_misses += 1
+            task = asyncio.ensure_future(self._fetch_cached(key, endpoint, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda x: self._inflight.get(key) is x and self._inflight.pop(key))
+        # A cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    async def _get_snapshot(self, parse: Callable[[Any], Any], endpoint: str, **params):
+        """Fetch and parse an endpoint, reusing the previous snapshot if the payload is unchanged."""
+        message = await self._get(endpoint, **params)
+        key = self._key(endpoint, params)
+        previous = self._snapshots.get(key)
+        # Cached messages are the same object, fetched ones compare without copies
+        if previous is not None and (previous[0] is message or previous[0] == message):
+            self.parse_skipped += 1
+            return previous[1]
+
+        snapshot = parse(message)
+        self._snapshots[key] = (message, snapshot)
+        self.parse_applied += 1
+        return snapshot
+
+    async def _fetch_cached(self, key: tuple, endpoint: str, params: dict):
+        epoch = self._cache_epoch
+        try:
+            message = await self._fetch(endpoint, params, key)
+        except RequestSuperseded:
+            # Share the read following the write instead
+            return await self._get(endpoint, **params)
+        ttl = self._cache_ttl.get(endpoint)
+        # Responses racing with a write may be outdated already
+        if ttl and message is not None and epoch == self._cache_epoch:
+            self._cache[key] = (time.monotonic() + ttl, message)
+        return message
+
+    async def _fetch(self, endpoint: str, params: dict, key: tuple | None = None):
+        """Fetch an endpoint, retrying timeouts and server errors."""
+        data = await self._request(
+            lambda: self._session.get(
+                self.BASE_URL + endpoint.format(
+                    user=self._user.get("id"),
+                    token=self.TOKEN,
+                    **params,
+                ),
+            ),
+            endpoint,
+            params.get("wifi_box"),
+            RequestPriority.READ,
+            key,
+            retries=self.RETRIES,
+        )
+        message = data.get("message")
+        if message is None:
+            raise BesmartPayloadError("Response without message.")
+        return message
+
+    async def _put(self, endpoint: str, fields: dict):
+        return await self._request(
+            lambda: self._session.put(
+                self.BASE_URL + endpoint,
+                data={
+                    **fields,
+                    "user_id": self._user.get("id"),
+                    "id": self._user.get("id"),
+                    "token": self.TOKEN,
+                },
+            ),
+            endpoint,
+            fields.get("wifi_box_id"),
+            RequestPriority.WRITE,
+        )
+
+    async def _request(
+        self,
+        send,
+        endpoint: str,
+        wifi_box: str | None = None,
+        priority: RequestPriority = RequestPriority.READ,
+        key: tuple | None = None,
+        retries: int = 0,
+    ):
+        """Send a request, retrying timeouts and server errors up to `retries` times.
+
+        The circuit breaker records the outcome of the request once, after its
+        retries, so that a single failing poll does not open it.
+        """
+        self._breaker.check()
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    data = await self._send_logged_in(send, endpoint, wifi_box, priority, key)
+                    break
+                except (BesmartTimeoutError, BesmartServerError) as ex:
+                    if attempt == retries:
+                        raise
+                    backoff = min(self.RETRY_BACKOFF * 2 ** attempt, self.RETRY_MAX_BACKOFF)
+                    backoff *= random.uniform(0.5, 1.0)
+                    _LOGGER.debug("%s, retrying in %.1fs", ex, backoff)
+                    await asyncio.sleep(backoff)
+        except (BesmartTimeoutError, BesmartServerError, BesmartPayloadError):
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+        return data
+
+    async def _send_logged_in(
+        self,
+        send,
+        endpoint: str,
+        wifi_box: str | None,
+        priority: RequestPriority,
+        key: tuple | None,
+    ) -> dict:
+        """Send a request, logging in again once if the session has expired."""
+        user = await self._ensure_login()
+        try:
+            return await self._send(send, endpoint, wifi_box, priority, key)
+        except BesmartAuthError:
+            _LOGGER.debug("session expired, logging in again")
+            await self._relogin(user)
+            return await self._send(send, endpoint, wifi_box, priority, key)
+
+    async def _send(
+        self,
+        send,
+        endpoint: str,
+        wifi_box: str | None = None,
+        priority: RequestPriority = RequestPriority.READ,
+        key: tuple | None = None,
+    ) -> dict:
+        """Send a request once the account has budget for it, classifying any failure."""
+        await self.scheduler.acquire(priority, key)
+        started = time.monotonic()
+        size = 0
+        try:
+            data, size = await self._receive(send)
+            if not isinstance(data, dict):
+                raise BesmartPayloadError("Unexpected response.")
+            if data.get("error_code") == self.ERROR_UNAUTHORIZED:
+                raise BesmartAuthError("Session rejected.")
+        except BesmartError as ex:
+            self.metrics.record(endpoint, wifi_box, time.monotonic() - started, size, type(ex).__name__)
+            raise
+        self.metrics.record(endpoint, wifi_box, time.monotonic() - started, size)
+        return data
+
+    async def _receive(self, send) -> tuple[Any, int]:
+        """Send a request and decode its payload.
+
+        The status is checked before the body is decoded, error pages are
+        rarely JSON. The connection goes back to the pool on any outcome, also
+        when the request fails or times out before its body was read.
+        """
+        try:
+            async with asyncio.timeout(self._timeout), send() as res:
+                if res.status >= 500:
+                    raise BesmartServerError(f"Server error {res.status}.")
+                if res.status in (401, 403):
+                    raise BesmartAuthError("Session rejected.")
+                if res.status >= 400:
+                    raise BesmartRequestError(f"Request failed with status {res.status}.")
+                body = await res.read()
+            data = self._decode(body)
+        except TimeoutError as ex:
+            raise BesmartTimeoutError("Request timed out.") from ex
+        except ValueError as ex:
+            raise BesmartPayloadError(f"Invalid response: {ex}") from ex
+        except aiohttp.ClientError as ex:
+            raise BesmartServerError(f"Request failed: {ex}") from ex
+        return data, len(body)
+
+    @staticmethod
+    def _decode(body: bytes) -> Any:
+        """Decode a response body, in a single pass over the bytes."""
+        return json_loads(body)
 
     async def _ensure_login(self):
         if not self._user:
-            await self.login()
+            async with self._login_lock:
+                # Callers waiting for the lock share the login of the first one
+                if not self._user:
+                    await self.login()
+        return self._user
+
+    async def _relogin(self, user):
+        async with self._login_lock:
+            # Only the first caller seeing the expired session logs in again
+            if self._user is user:
+                self._user = None
+                await self.login()
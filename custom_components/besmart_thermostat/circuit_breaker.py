@@ -0,0 +1,59 @@
+"""Circuit breaker protecting the BeSMART API while it is degraded."""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from .exceptions import BesmartCircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Class short-circuiting requests after repeated failures.
+
+    The circuit opens after `failure_threshold` consecutive failures. Requests
+    then fail right away until `reset_timeout` seconds have passed. After that,
+    the next request decides: success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0) -> None:
+        """Initialize the circuit breaker."""
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        """Return the state of the circuit."""
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self._reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def check(self) -> None:
+        """Raise if requests must not be sent right now."""
+        if self.state == self.OPEN:
+            raise BesmartCircuitOpenError("BeSMART API is degraded, skipping request.")
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        if self._opened_at is not None:
+            _LOGGER.info("BeSMART API recovered, closing circuit")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure and open the circuit once there are too many."""
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._opened_at is None:
+                _LOGGER.warning("BeSMART API is degraded, opening circuit for %ss", self._reset_timeout)
+            self._opened_at = time.monotonic()
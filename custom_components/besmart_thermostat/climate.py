@@ -11,9 +11,8 @@ tested with home-assistant >= 0.96
 
 """
 import logging
-from datetime import datetime
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import (
@@ -30,8 +29,12 @@ from homeassistant.const import (
 )
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .coalescer import CoalescingWriter
+from .const import DOMAIN, SETPOINT_WRITE_DELAY
+from .coordinator import BesmartCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,6 +46,7 @@ DEFAULT_TIMEOUT = 3
 ENTITY_ID_FORMAT = PLATFORM_DOMAIN + ".{}"
 
 ATTR_MODE = "mode"
+ATTR_STALE = "stale"
 STATE_UNKNOWN = "unknown"
 
 
@@ -56,12 +60,12 @@ async def async_setup_entry(
     for device in config_entry.interface_devices:
         wifi_box = device.wifi_box
         for thermostat in device.thermostats:
-            room_id = thermostat.get("id")
-            room_name = thermostat.get("name")
-            new_entities.append(Thermostat(hass, config_entry, wifi_box, room_id, room_name, device.device_info))
+            room_id = thermostat.id
+            room_name = thermostat.name
+            new_entities.append(Thermostat(hass, config_entry, device.coordinator, wifi_box, room_id, room_name, device.device_info))
 
     if new_entities:
-        async_add_entities(new_entities, update_before_add=True)
+        async_add_entities(new_entities)
 
 
 async def async_remove_entry(hass, entry) -> None:
@@ -70,11 +74,10 @@ async def async_remove_entry(hass, entry) -> None:
 
 # pylint: disable=abstract-method
 # pylint: disable=too-many-instance-attributes
-class Thermostat(ClimateEntity):
+class Thermostat(CoordinatorEntity[BesmartCoordinator], ClimateEntity):
     """Representation of a Besmart thermostat."""
 
     _attr_has_entity_name = True
-    _attr_should_poll = True
     _default_name = "Thermostat"
     _entity_id_format = ENTITY_ID_FORMAT
     _attr_unique_id: str
@@ -112,6 +115,20 @@ class Thermostat(ClimateEntity):
     }
     PRESET_MODE_LIST = PRESET_MODE_LIST = list(p for p in PRESET_HA_TO_BESMART if p != "DHW")
 
+    # Payload field holding the setpoint of each temperature mark
+    TEMP_FIELDS = {
+        "0": "frost_temp",
+        "1": "economy_temp",
+        "2": "comfort_temp",
+    }
+
+    # Temperature mark of each setpoint
+    SETPOINTS = {
+        "frost": "0",
+        "economy": "1",
+        "comfort": "2",
+    }
+
     HVAC_MODE_BESMART_TO_HA = {
         "1": HVACMode.HEAT,
         "0": HVACMode.COOL,
@@ -123,8 +140,9 @@ class Thermostat(ClimateEntity):
         HVACMode.COOL: "0",
     }
 
-    def __init__(self, hass, config_entry, wifi_box, room_id, room_name, device_info):
+    def __init__(self, hass, config_entry, coordinator, wifi_box, room_id, room_name, device_info):
         """Initialize the thermostat."""
+        super().__init__(coordinator)
         self._entry_name = config_entry.options[CONF_NAME]
         self._supported_modes = config_entry.options[CONF_MODE] + [HVACMode.OFF]
         self._entry_id = config_entry.entry_id
@@ -132,18 +150,26 @@ class Thermostat(ClimateEntity):
         self._room_id = room_id
         self._room_name = room_name
         self._cl = config_entry.runtime_data
-        self._current_temp = 0
+        self._current_temp = None
         self._current_state = self.IDLE
         self._current_operation = ""
-        self._current_unit = 0
-        self._tempSet = 0
-        self._tempSetMark = 0
+        self._current_unit = "0"
+        self._tempSet = None
+        self._tempSetMark = None
         self._heating_state = False
-        self._battery = "0"
-        self._frostT = 0
-        self._saveT = 0
-        self._comfT = 0
+        self._battery = False
+        self._frostT = None
+        self._saveT = None
+        self._comfT = None
         self._season = "1"
+        self._holiday_end_time = None
+        self._fingerprint = None
+
+        # one writer per setpoint (frost, economy, comfort) so that changes of one never replace another
+        self._temp_writers = {
+            mark: CoalescingWriter(hass, SETPOINT_WRITE_DELAY, self._async_write_temperature(mark))
+            for mark in ("0", "1", "2")
+        }
 
         # link to BeSMART device
         self._attr_device_info = device_info
@@ -160,169 +186,80 @@ class Thermostat(ClimateEntity):
         # Disable backwards compatibility for new turn_on/off methods
         self._enable_turn_on_off_backwards_compatibility = False
 
-    @property
-    def current_temperature(self):
-        """Return the current temperature."""
-        return self._current_temp
-
-    @property
-    def hvac_action(self):
-        """Current mode."""
-        if self._heating_state:
-            mode = self.hvac_mode
-            if mode == HVACMode.HEAT:
-                return HVACAction.HEATING
-            else:
-                return HVACAction.COOLING
-        elif self._current_state == self.DHW:
-            return HVACAction.OFF
-        else:
-            return HVACAction.IDLE
-
-    @property
-    def hvac_mode(self):
-        """Current mode."""
-        if self._current_state == self.DHW:
-            return HVACMode.OFF
-        return self.HVAC_MODE_BESMART_TO_HA.get(self._season)
+        self._update_state()
 
     @property
     def hvac_modes(self):
         """List of available operation modes."""
         return self._supported_modes
 
-    @property
-    def max_temp(self):
-        """The maximum temperature."""
-        if self._tempSetMark == "2":
-            return self.CLIMATE_TEMP_MAX
-        elif self._tempSetMark == "1":
-            return self._comfT - self.CLIMATE_TEMP_STEP
-        elif self._tempSetMark == "0":
-            return self._saveT - self.CLIMATE_TEMP_STEP
-
-    @property
-    def min_temp(self):
-        """The minimum temperature."""
-        if self._tempSetMark == "2":
-            return self._saveT + self.CLIMATE_TEMP_STEP
-        elif self._tempSetMark == "1":
-            return self._frostT + self.CLIMATE_TEMP_STEP
-        elif self._tempSetMark == "0":
-            return self.CLIMATE_TEMP_MIN
-
     @property
     def precision(self):
         """The temperature precision (defaults to 0.1deg C)."""
         return self.CLIMATE_TEMP_PRECISION
 
-    @property
-    def preset_mode(self):
-        """List of supported preset (comfort, home, sleep, Party, Off)."""
-        return self.PRESET_BESMART_TO_HA.get(self._current_state, "IDLE")
-
     @property
     def preset_modes(self):
         """List of supported preset (comfort, home, sleep, Party, Off)."""
         return self.PRESET_MODE_LIST
 
-    @property
-    def target_temperature(self):
-        """Return the temperature we try to reach."""
-        if self._tempSetMark == "2":
-            return self._comfT
-        elif self._tempSetMark == "1":
-            return self._saveT
-        elif self._tempSetMark == "0":
-            return self._frostT
-
     @property
     def target_temperature_step(self):
         """Return the supported step of target temperature."""
         return self.CLIMATE_TEMP_STEP
 
-    @property
-    def temperature_unit(self):
-        """Return the unit of measurement."""
-        if self._current_unit == "0":
-            return UnitOfTemperature.CELSIUS
+    async def async_will_remove_from_hass(self) -> None:
+        """Send pending setpoint changes before the entity goes away."""
+        for writer in self._temp_writers.values():
+            await writer.async_shutdown()
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self._update_state():
+            self.coordinator.updates_applied += 1
+            super()._handle_coordinator_update()
         else:
-            return UnitOfTemperature.FAHRENHEIT
+            self.coordinator.updates_skipped += 1
+
+    def _update_state(self) -> bool:
+        """Update the state from the latest WiFi box data, returning whether it changed."""
+        thermostat = self.coordinator.data.thermostats.get(self._room_id)
+        if thermostat is None:
+            return False
+        thermostat = self.coordinator.pending.apply(self._room_id, thermostat)
+        updating = self.coordinator.pending.is_pending(self._room_id, *self.TEMP_FIELDS.values())
+        program_mark = thermostat.program.mark_at(dt_util.now()) if thermostat.program is not None else None
+
+        # Availability follows the coordinator, its changes must be written too
+        stale = self.coordinator.data.stale
+        fingerprint = (thermostat, updating, program_mark, stale, self.coordinator.last_update_success)
+        if fingerprint == self._fingerprint:
+            return False
+        self._fingerprint = fingerprint
+
+        self._current_state = self.AUTO if thermostat.mode is None else thermostat.mode
+        self._season = thermostat.season
+        self._current_unit = thermostat.unit
+        self._current_temp = thermostat.current_temp
+        self._tempSet = thermostat.target_temp
+        self._frostT = thermostat.frost_temp
+        self._saveT = thermostat.economy_temp
+        self._comfT = thermostat.comfort_temp
+        self._heating_state = bool(thermostat.heating)
+        self._battery = bool(thermostat.battery_low)
 
-    @property
-    def supported_features(self):
-        """Return the list of supported features."""
-        if self._current_state == self.DHW:
-            return (
-                ClimateEntityFeature.TURN_ON |
-                ClimateEntityFeature.TURN_OFF
-            )
-
-        return (
-            ClimateEntityFeature.TARGET_TEMPERATURE |
-            ClimateEntityFeature.PRESET_MODE |
-            ClimateEntityFeature.TURN_ON |
-            ClimateEntityFeature.TURN_OFF
-        )
-
-    @property
-    def extra_state_attributes(self):
-        """Return the device specific state attributes."""
-        return {
-            ATTR_MODE: self._current_state,
-            "updating_temp": self._tempSet != self.target_temperature
-            # "battery_state": self._battery,
-            # "frost_t": self._frostT,
-            # "confort_t": self._comfT,
-            # "save_t": self._saveT,
-            # "season_mode": self.hvac_mode,
-            # "heating_state": self._heating_state,
-        }
-
-    async def async_update(self):
-        """Update the data from the thermostat."""
-        _LOGGER.debug("Update called")
-
-        # Get thermostat data
-        thermostat = await self._cl.thermostat(self._wifi_box, self._room_id)
-
-        try:
-            self._tempSet = float(thermostat.get("target_temp"))
-        except ValueError:
-            self._tempSet = 0.0
-
-        # Current mode
-        try:
-            self._current_state = int(thermostat.get("mode"))
-        except ValueError:
-            self._current_state = 0
-        
         if self._current_state == self.AUTO:
-            # Extract current program step
-            try:
-                # from Sunday (0) to Saturday (6)
-                today = datetime.today().isoweekday() % 7
-                # 48 slot per day
-                index = datetime.today().hour * 2 + (
-                        1 if datetime.today().minute > 30 else 0
-                )
-                programWeek = thermostat["program"]
-                # delete programWeek to have less noise on debug output
-                del thermostat["program"]
-                self._tempSetMark = programWeek[today][index]
-            except Exception as ex:
-                _LOGGER.warning(ex)
+            # advance option is used for switching to the ECO mode (automatically disables at holiday_end_time)
+            if thermostat.advance:
+                self._holiday_end_time = thermostat.holiday_end_time
+                self._tempSetMark = "1"
+            elif program_mark is not None:
+                # Extract current program step
+                self._tempSetMark = program_mark
+            else:
                 self._tempSetMark = "2"
-
-            # Extract manual toggle for ECO (night) mode
-            try:
-                # advance option is used for switching to the ECO mode (automatically disables at holiday_end_time)
-                if thermostat.get("advance") == "1":
-                    self._holiday_end_time = int(thermostat["holiday_end_time"])
-                    self._tempSetMark = "1"
-            except Exception as ex:
-                _LOGGER.warning(ex)
-                self._holiday_end_time = None
         elif self._current_state == self.MANUAL or self._current_state == self.PARTY:
             self._tempSetMark = "2"
         elif self._current_state == self.ECONOMY:
@@ -330,36 +267,61 @@ class Thermostat(ClimateEntity):
         elif self._current_state == self.IDLE:
             self._tempSetMark = "0"
 
-        # Extract programmed temperatures
-        try:
-            self._frostT = float(thermostat.get("frost_temp"))
-        except ValueError:
-            self._frostT = 0.0
-        try:
-            self._saveT = float(thermostat.get("economy_temp"))
-        except ValueError:
-            self._saveT = 0.0
-        try:
-            self._comfT = float(thermostat.get("comfort_temp"))
-        except ValueError:
-            self._comfT = 0.0
-
-        # Extract current temperature
-        try:
-            self._current_temp = float(thermostat.get("current_temp"))
-        except ValueError:
-            self._current_temp = 0.0
-
-        # Current heating state
-        self._heating_state = thermostat.get("heating_status", "") == "1"
-
-        # Misc
-        try:
-            self._battery = not bool(int(thermostat.get("battery_power")))
-        except ValueError:
-            self._battery = False
-        self._current_unit = thermostat.get("unit")
-        self._season = thermostat.get("season")
+        # Setpoints of the neighbouring marks bound the one being edited
+        if self._tempSetMark == "2":
+            self._attr_target_temperature = self._comfT
+            self._attr_min_temp = self._bound(self._saveT, self.CLIMATE_TEMP_STEP, self.CLIMATE_TEMP_MIN)
+            self._attr_max_temp = self.CLIMATE_TEMP_MAX
+        elif self._tempSetMark == "1":
+            self._attr_target_temperature = self._saveT
+            self._attr_min_temp = self._bound(self._frostT, self.CLIMATE_TEMP_STEP, self.CLIMATE_TEMP_MIN)
+            self._attr_max_temp = self._bound(self._comfT, -self.CLIMATE_TEMP_STEP, self.CLIMATE_TEMP_MAX)
+        elif self._tempSetMark == "0":
+            self._attr_target_temperature = self._frostT
+            self._attr_min_temp = self.CLIMATE_TEMP_MIN
+            self._attr_max_temp = self._bound(self._saveT, -self.CLIMATE_TEMP_STEP, self.CLIMATE_TEMP_MAX)
+
+        self._attr_current_temperature = self._current_temp
+        self._attr_temperature_unit = (
+            UnitOfTemperature.CELSIUS if self._current_unit == "0" else UnitOfTemperature.FAHRENHEIT
+        )
+        self._attr_preset_mode = self.PRESET_BESMART_TO_HA.get(self._current_state, "IDLE")
+
+        if self._current_state == self.DHW:
+            self._attr_hvac_mode = HVACMode.OFF
+            self._attr_supported_features = (
+                ClimateEntityFeature.TURN_ON |
+                ClimateEntityFeature.TURN_OFF
+            )
+        else:
+            self._attr_hvac_mode = self.HVAC_MODE_BESMART_TO_HA.get(self._season)
+            self._attr_supported_features = (
+                ClimateEntityFeature.TARGET_TEMPERATURE |
+                ClimateEntityFeature.PRESET_MODE |
+                ClimateEntityFeature.TURN_ON |
+                ClimateEntityFeature.TURN_OFF
+            )
+
+        if self._heating_state:
+            if self._attr_hvac_mode == HVACMode.HEAT:
+                self._attr_hvac_action = HVACAction.HEATING
+            else:
+                self._attr_hvac_action = HVACAction.COOLING
+        elif self._current_state == self.DHW:
+            self._attr_hvac_action = HVACAction.OFF
+        else:
+            self._attr_hvac_action = HVACAction.IDLE
+
+        self._attr_extra_state_attributes = {
+            ATTR_MODE: self._current_state,
+            "updating_temp": updating,
+            ATTR_STALE: stale,
+        }
+        return True
+
+    @staticmethod
+    def _bound(setpoint, offset, default):
+        return default if setpoint is None else setpoint + offset
 
     async def async_turn_on(self):
         await self.async_set_preset_mode(self.PRESET_BESMART_TO_HA.get(self.AUTO))
@@ -375,7 +337,9 @@ class Thermostat(ClimateEntity):
         elif hvac_mode in self._supported_modes:
             current_hvac_mode = self.hvac_mode
             if season != None and self._season != season:
-                await self._cl.setThermostatSeason(self._room_name, season)
+                if await self._cl.setThermostatSeason(self._wifi_box, self._room_id, season):
+                    self.coordinator.pending.async_add(self._room_id, "season", season)
+                await self.coordinator.async_request_device_refresh(self._room_id)
             if current_hvac_mode == HVACMode.OFF:
                 await self.async_turn_on()
             _LOGGER.debug("Set hvac_mode hvac_mode=%s(%s)", str(hvac_mode), str(season))
@@ -383,7 +347,9 @@ class Thermostat(ClimateEntity):
     async def async_set_preset_mode(self, preset_mode):
         """Set HVAC mode (comfort, home, sleep, Party, Off)."""
         mode = self.PRESET_HA_TO_BESMART.get(preset_mode, self.AUTO)
-        await self._cl.setThermostatMode(self._wifi_box, self._room_id, mode)
+        if await self._cl.setThermostatMode(self._wifi_box, self._room_id, mode):
+            self.coordinator.pending.async_add(self._room_id, "mode", mode)
+        await self.coordinator.async_request_device_refresh(self._room_id)
         _LOGGER.debug("Set operation mode=%s(%s)", str(preset_mode), str(mode))
 
     async def async_set_temperature(self, **kwargs):
@@ -394,9 +360,15 @@ class Thermostat(ClimateEntity):
             return
         
         _LOGGER.debug(f"setting new temp {self._tempSetMark} {self._room_name} {temperature}")
-        if self._tempSetMark == "2":
-            await self._cl.setThermostatTemp(self._wifi_box, self._room_id, temperature, self._tempSetMark)
-        elif self._tempSetMark == "1":
-            await self._cl.setThermostatTemp(self._wifi_box, self._room_id, temperature, self._tempSetMark)
-        elif self._tempSetMark == "0":
-            await self._cl.setThermostatTemp(self._wifi_box, self._room_id, temperature, self._tempSetMark)
+        writer = self._temp_writers.get(self._tempSetMark)
+        if writer is not None:
+            await writer.async_write(temperature)
+
+    def _async_write_temperature(self, tempMode):
+        async def write(temperature):
+            result = await self._cl.setThermostatTemp(self._wifi_box, self._room_id, temperature, tempMode)
+            if result:
+                self.coordinator.pending.async_add(self._room_id, self.TEMP_FIELDS[tempMode], float(temperature))
+            await self.coordinator.async_request_device_refresh(self._room_id)
+            return result
+        return write
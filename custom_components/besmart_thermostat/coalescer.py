@@ -0,0 +1,80 @@
+"""Coalescing of repeated writes to BeSMART devices."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+
+class CoalescingWriter:
+    """Class delaying writes and sending only the latest requested value.
+
+    Every write waits `delay` seconds. A write requested in the meantime replaces
+    the pending value instead of being queued behind it. All callers of a batch
+    get the result of the single write that was actually sent.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        delay: float,
+        write: Callable[[Any], Awaitable[bool]],
+    ) -> None:
+        """Initialize the writer."""
+        self._hass = hass
+        self._delay = delay
+        self._write = write
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._value: Any = None
+        self._waiters: list[asyncio.Future[bool]] = []
+        self._sends: set[asyncio.Task] = set()
+
+    async def async_write(self, value: Any) -> bool:
+        """Write a value once no newer value was requested within the delay."""
+        future = self._hass.loop.create_future()
+        self._value = value
+        self._waiters.append(future)
+
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._hass.loop.call_later(self._delay, self._async_flush)
+
+        return await asyncio.shield(future)
+
+    async def async_shutdown(self) -> None:
+        """Send the pending write right away and wait for writes being sent."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            await self._async_send()
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+
+    @callback
+    def _async_flush(self) -> None:
+        self._timer = None
+        task = self._hass.async_create_task(self._async_send())
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    async def _async_send(self) -> None:
+        value, waiters = self._value, self._waiters
+        self._value, self._waiters = None, []
+
+        # Writes of subsequent batches must reach the device in order
+        async with self._lock:
+            try:
+                result = await self._write(value)
+            except Exception as ex:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(ex)
+                return
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(result)
@@ -7,11 +7,14 @@ from typing import Any, cast
 
 import voluptuous as vol
 
+from homeassistant.config_entries import ConfigFlowResult
 from homeassistant.const import (
     CONF_NAME,
     CONF_USERNAME,
     CONF_PASSWORD,
     CONF_MODE,
+    CONF_SCAN_INTERVAL,
+    CONF_VERIFY_SSL,
 )
 from homeassistant.helpers import selector
 from homeassistant.helpers.schema_config_entry_flow import (
@@ -20,7 +23,21 @@ from homeassistant.helpers.schema_config_entry_flow import (
 )
 from homeassistant.components.climate.const import HVACMode
 
-from .const import DOMAIN
+from .api import BesmartClient
+from .const import (
+    CONF_DETAIL_INTERVAL,
+    CONF_DISCOVERY_CONCURRENCY,
+    CONF_REQUEST_RATE,
+    CONF_SETTINGS_INTERVAL,
+    DEFAULT_DETAIL_INTERVAL,
+    DEFAULT_DISCOVERY_CONCURRENCY,
+    DEFAULT_REQUEST_RATE,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SETTINGS_INTERVAL,
+    DEFAULT_VERIFY_SSL,
+    DOMAIN,
+)
+from .exceptions import BesmartAuthError
 
 OPTIONS_SCHEMA = {
     vol.Required(CONF_NAME): selector.TextSelector(),
@@ -33,6 +50,41 @@ OPTIONS_SCHEMA = {
         ],
         "multiple": True,
     }),
+    vol.Optional(CONF_DISCOVERY_CONCURRENCY, default=DEFAULT_DISCOVERY_CONCURRENCY): selector.NumberSelector({
+        "min": 1,
+        "max": 16,
+        "step": 1,
+        "mode": selector.NumberSelectorMode.BOX,
+    }),
+    vol.Optional(CONF_REQUEST_RATE, default=DEFAULT_REQUEST_RATE): selector.NumberSelector({
+        "min": 5,
+        "max": 600,
+        "step": 1,
+        "unit_of_measurement": "requests/min",
+        "mode": selector.NumberSelectorMode.BOX,
+    }),
+    vol.Optional(CONF_VERIFY_SSL, default=DEFAULT_VERIFY_SSL): selector.BooleanSelector(),
+    vol.Optional(CONF_SCAN_INTERVAL, default=int(DEFAULT_SCAN_INTERVAL.total_seconds())): selector.NumberSelector({
+        "min": 15,
+        "max": 600,
+        "step": 1,
+        "unit_of_measurement": "s",
+        "mode": selector.NumberSelectorMode.BOX,
+    }),
+    vol.Optional(CONF_DETAIL_INTERVAL, default=int(DEFAULT_DETAIL_INTERVAL.total_seconds()) // 60): selector.NumberSelector({
+        "min": 1,
+        "max": 240,
+        "step": 1,
+        "unit_of_measurement": "min",
+        "mode": selector.NumberSelectorMode.BOX,
+    }),
+    vol.Optional(CONF_SETTINGS_INTERVAL, default=int(DEFAULT_SETTINGS_INTERVAL.total_seconds()) // 60): selector.NumberSelector({
+        "min": 5,
+        "max": 1440,
+        "step": 1,
+        "unit_of_measurement": "min",
+        "mode": selector.NumberSelectorMode.BOX,
+    }),
 }
 
 CONFIG_SCHEMA = {
@@ -40,6 +92,11 @@ CONFIG_SCHEMA = {
 }
 
 
+REAUTH_SCHEMA = {
+    vol.Required(CONF_PASSWORD): selector.TextSelector({ "type": selector.TextSelectorType.PASSWORD }),
+}
+
+
 CONFIG_FLOW = {
     "user": SchemaFlowFormStep(vol.Schema(CONFIG_SCHEMA)),
 }
@@ -60,3 +117,38 @@ class ConfigFlowHandler(SchemaConfigFlowHandler, domain=DOMAIN):
     def async_config_entry_title(self, options: Mapping[str, Any]) -> str:
         """Return config entry title."""
         return cast(str, options[CONF_NAME])
+
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> ConfigFlowResult:
+        """Handle a password rejected by the BeSMART cloud."""
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Ask for the new password of the account and check it before reloading the entry."""
+        entry = self._get_reauth_entry()
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            client = BesmartClient(
+                self.hass,
+                entry.options[CONF_USERNAME],
+                user_input[CONF_PASSWORD],
+                verify_ssl=entry.options.get(CONF_VERIFY_SSL, DEFAULT_VERIFY_SSL),
+            )
+            try:
+                await client.async_ensure_login()
+            except BesmartAuthError:
+                errors["base"] = "invalid_auth"
+            except Exception:
+                errors["base"] = "cannot_connect"
+            finally:
+                await client.async_close()
+            if not errors:
+                return self.async_update_reload_and_abort(
+                    entry, options={**entry.options, CONF_PASSWORD: user_input[CONF_PASSWORD]}
+                )
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema(REAUTH_SCHEMA),
+            errors=errors,
+            description_placeholders={"username": entry.options[CONF_USERNAME]},
+        )
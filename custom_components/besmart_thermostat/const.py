@@ -1,10 +1,62 @@
 """Constants for the BeSMART Thermostat."""
 
+from datetime import timedelta
+
 from homeassistant.const import Platform
 
 DOMAIN = "besmart_thermostat"
 
 PLATFORMS: list[Platform] = [
     Platform.CLIMATE,
+    Platform.SENSOR,
     Platform.WATER_HEATER,
 ]
+
+CONF_DISCOVERY_CONCURRENCY = "discovery_concurrency"
+
+# Maximum number of WiFi boxes set up at the same time
+DEFAULT_DISCOVERY_CONCURRENCY = 4
+# Time after which a WiFi box is skipped during setup
+DISCOVERY_TIMEOUT = 30
+# First delay before skipped WiFi boxes are tried again, doubling up to MAX_ERROR_SCAN_INTERVAL
+DISCOVERY_RETRY_INTERVAL = timedelta(minutes=1)
+
+CONF_REQUEST_RATE = "request_rate"
+
+# Requests per minute an account may send once its burst is used up
+DEFAULT_REQUEST_RATE = 60
+
+# Seconds changes of the WiFi box data are batched before they are stored
+STORE_SAVE_DELAY = 60
+
+# Whether the certificate of the BeSMART cloud is verified
+DEFAULT_VERIFY_SSL = True
+
+CONF_DETAIL_INTERVAL = "detail_interval"
+CONF_SETTINGS_INTERVAL = "settings_interval"
+
+# How often the WiFi box payload, carrying the measured temperatures, is fetched
+DEFAULT_SCAN_INTERVAL = timedelta(minutes=1)
+# Maximum age of per-device detail payloads (thermostat / boiler data)
+DEFAULT_DETAIL_INTERVAL = timedelta(minutes=15)
+# Maximum age of cached thermostat settings (unit, season, limits)
+DEFAULT_SETTINGS_INTERVAL = timedelta(hours=6)
+# Maximum age of a WiFi box snapshot commands may be based on
+SNAPSHOT_MAX_AGE = timedelta(minutes=10)
+
+# Faster polling after a command or a program transition
+BURST_SCAN_INTERVAL = timedelta(seconds=15)
+BURST_DURATION = timedelta(minutes=3)
+# Slower polling while snapshots stay unchanged
+IDLE_AFTER_UNCHANGED = 3
+MAX_IDLE_SCAN_INTERVAL = timedelta(minutes=5)
+# Upper bound of the backoff while the cloud keeps failing
+MAX_ERROR_SCAN_INTERVAL = timedelta(minutes=15)
+
+# Maximum number of thermostats a service writes to at the same time
+SERVICE_CONCURRENCY = 4
+
+# Time a setpoint change waits for a newer value before it is sent
+SETPOINT_WRITE_DELAY = 1.5
+# Time the cloud has to reflect a command before its optimistic state is rolled back
+COMMAND_CONFIRM_TIMEOUT = timedelta(minutes=5)
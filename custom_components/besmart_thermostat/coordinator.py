@@ -0,0 +1,244 @@
+"""Data update coordinator for BeSMART WiFi boxes."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import BesmartClient
+from .const import (
+    COMMAND_CONFIRM_TIMEOUT,
+    DEFAULT_DETAIL_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+)
+from .exceptions import BesmartCircuitOpenError, BesmartError
+from .models import BoilerSnapshot, ThermostatSnapshot, WifiBoxSnapshot, merge
+from .pending import PendingCommandTracker
+from .polling import AdaptivePolling, PollingReason
+
+_LOGGER = logging.getLogger(__name__)
+
+BOILER = "boiler"
+
+# Fields changing all the time, the WiFi box payload carries them fresh every cycle
+LIVE_FIELDS = {
+    ThermostatSnapshot: ("current_temp", "heating", "battery_low"),
+    BoilerSnapshot: ("dhw_current_temp", "flame_status", "system_pressure"),
+}
+
+
+class BesmartCoordinator(DataUpdateCoordinator[WifiBoxSnapshot]):
+    """Class polling a single BeSMART WiFi box on behalf of all its entities.
+
+    Polling is tiered by how often fields change. Each cycle fetches the
+    light WiFi box payload once, which carries the measured temperatures.
+    The heavy detail payloads of a device (thermostat or boiler data) are
+    only fetched again when the box payload reports a change of anything
+    but its LIVE_FIELDS, while a command sent to it is pending or when the
+    cached detail is older than the detail interval. Thermostat settings
+    are only read on demand, see BesmartClient.
+
+    The interval between cycles adapts to commands, program transitions,
+    unchanged snapshots and cloud errors, see AdaptivePolling.
+
+    Entities are only notified when a snapshot changed, and only write their
+    state when their own part of it did.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry | None,
+        client: BesmartClient,
+        wifi_box: str,
+        scan_interval: timedelta = DEFAULT_SCAN_INTERVAL,
+        detail_interval: timedelta = DEFAULT_DETAIL_INTERVAL,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=entry,
+            name=f"{DOMAIN} {wifi_box}",
+            update_interval=scan_interval,
+            # Snapshots compare by value, unchanged ones do not notify entities
+            always_update=False,
+        )
+        self.wifi_box = wifi_box
+        self._client = client
+        self._summaries: dict[str, BoilerSnapshot | ThermostatSnapshot] = {}
+        self._details: dict[str, BoilerSnapshot | ThermostatSnapshot] = {}
+        self._fetched_at: dict[str, float] = {}
+        self._detail_interval = detail_interval
+        self.pending = PendingCommandTracker(hass, COMMAND_CONFIRM_TIMEOUT, self.async_update_listeners)
+        self.polling = AdaptivePolling(scan_interval)
+        self._transition_at: datetime | None = None
+        self._unsub_transition = None
+        self._updated_at: float | None = None
+        # Entity state writes, and those skipped because nothing changed
+        self.updates_applied = 0
+        self.updates_skipped = 0
+
+    async def async_shutdown(self) -> None:
+        """Shut down the coordinator and drop pending commands."""
+        if self._unsub_transition is not None:
+            self._unsub_transition()
+            self._unsub_transition = None
+        self.pending.async_shutdown()
+        await super().async_shutdown()
+
+    @callback
+    def async_restore(self, data: WifiBoxSnapshot) -> None:
+        """Serve stored data until the first refresh, unless another config entry fetched data already."""
+        if self.data is None:
+            self.data = data
+
+    async def async_ensure_data(self) -> None:
+        """Fetch the first data of the WiFi box, unless another config entry did already."""
+        if self.data is None or not self.last_update_success:
+            await self.async_refresh()
+        if not self.last_update_success:
+            raise ConfigEntryNotReady(f"Unable to fetch data of WiFi box {self.wifi_box}") from self.last_exception
+
+    async def async_get_snapshot(self, max_age: timedelta) -> WifiBoxSnapshot | None:
+        """Return the latest snapshot, refreshing it first if it is older than max_age.
+
+        A failed refresh leaves the previous snapshot, if any.
+        """
+        if self._updated_at is None or time.monotonic() - self._updated_at > max_age.total_seconds():
+            await self.async_refresh()
+        return self.data
+
+    async def async_request_device_refresh(self, *device_ids: str) -> None:
+        """Request a refresh including the detail payload of the given devices."""
+        for device_id in device_ids:
+            self._fetched_at.pop(device_id, None)
+        self.update_interval = self.polling.burst(PollingReason.WRITE)
+        await self.async_request_refresh()
+
+    @callback
+    def _async_schedule_transition(self, data: WifiBoxSnapshot) -> None:
+        """Schedule a refresh at the next program transition of any thermostat in AUTO mode."""
+        now = dt_util.now()
+        transitions = [
+            thermostat.program.next_transition(now)
+            for thermostat in data.thermostats.values()
+            if thermostat.program is not None and thermostat.mode == 0
+        ]
+        transition_at = min(filter(None, transitions), default=None)
+
+        if transition_at == self._transition_at:
+            return
+        if self._unsub_transition is not None:
+            self._unsub_transition()
+            self._unsub_transition = None
+        self._transition_at = transition_at
+        if transition_at is not None:
+            self._unsub_transition = async_track_point_in_time(
+                self.hass, self._async_transition, transition_at
+            )
+
+    @callback
+    def _async_transition(self, now: datetime) -> None:
+        """Update setpoints of all thermostats and poll faster at a program transition."""
+        self._unsub_transition = None
+        self._transition_at = None
+        self.async_update_listeners()
+        self._async_schedule_transition(self.data)
+        self.update_interval = self.polling.burst(PollingReason.TRANSITION)
+        self.hass.async_create_task(self.async_request_refresh())
+
+    def _needs_detail(self, device_id: str, summary, now: float) -> bool:
+        fetched_at = self._fetched_at.get(device_id)
+        if fetched_at is None or now - fetched_at > self._detail_interval.total_seconds():
+            return True
+        if self.pending.is_pending(device_id):
+            return True
+        previous = self._summaries.get(device_id)
+        return previous is None or _settled(previous) != _settled(summary)
+
+    def _expire_settings(self, thermostat: str, summary: ThermostatSnapshot) -> None:
+        """Drop cached settings of a thermostat whose season or unit changed, e.g. on its display."""
+        previous = self._summaries.get(thermostat)
+        if previous is not None and (previous.season, previous.unit) != (summary.season, summary.unit):
+            self._client.expire_settings(self.wifi_box, thermostat)
+
+    async def _fetch_detail(self, device_id: str):
+        if device_id == BOILER:
+            return await self._client.boiler(self.wifi_box)
+        return await self._client.thermostat(self.wifi_box, device_id)
+
+    async def _async_update_data(self) -> WifiBoxSnapshot:
+        """Fetch the latest data and adapt the polling interval to it."""
+        try:
+            data = await self._async_fetch_box_data()
+        except BesmartCircuitOpenError as ex:
+            self.update_interval = self.polling.failure()
+            if self.data is None:
+                raise UpdateFailed(str(ex)) from ex
+            # Keep serving the last good data until the API recovers
+            _LOGGER.debug("%s Serving last data of WiFi box %s.", ex, self.wifi_box)
+            return self.data
+        except BesmartError as ex:
+            self.update_interval = self.polling.failure()
+            raise UpdateFailed(f"Unable to fetch data of WiFi box {self.wifi_box}: {ex}") from ex
+        self._updated_at = time.monotonic()
+        self.update_interval = self.polling.success(data != self.data)
+        self._async_schedule_transition(data)
+        return data
+
+    async def _async_fetch_box_data(self) -> WifiBoxSnapshot:
+        """Fetch the WiFi box payload and the detail payloads that changed."""
+        devices = await self._client.devices(self.wifi_box)
+
+        summaries = { BOILER: devices.boiler, **devices.thermostats }
+
+        for thermostat, summary in devices.thermostats.items():
+            self._expire_settings(thermostat, summary)
+
+        now = time.monotonic()
+        outdated = [x for x, summary in summaries.items() if self._needs_detail(x, summary, now)]
+        details = await asyncio.gather(
+            *(self._fetch_detail(x) for x in outdated),
+            return_exceptions=True,
+        )
+        for device_id, detail in zip(outdated, details):
+            if isinstance(detail, BesmartError):
+                # Keep the previous detail and retry on the next cycle
+                _LOGGER.debug("Unable to fetch data of %s: %s", device_id, detail)
+                self._fetched_at.pop(device_id, None)
+                continue
+            if isinstance(detail, BaseException):
+                raise detail
+            self._details[device_id] = detail
+            self._fetched_at[device_id] = now
+        self._summaries = summaries
+
+        # The box payload is the freshest, detail payloads fill in the rest
+        def snapshot(device_id: str):
+            data = summaries[device_id]
+            if (detail := self._details.get(device_id)) is not None:
+                data = merge(detail, data)
+            self.pending.async_confirm(device_id, data)
+            return data
+
+        return WifiBoxSnapshot(
+            boiler=snapshot(BOILER),
+            thermostats={ x: snapshot(x) for x in summaries if x != BOILER },
+        )
+
+
+def _settled(summary: BoilerSnapshot | ThermostatSnapshot) -> BoilerSnapshot | ThermostatSnapshot:
+    """Return a summary without its live fields."""
+    return replace(summary, **dict.fromkeys(LIVE_FIELDS[type(summary)]))
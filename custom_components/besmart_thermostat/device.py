@@ -9,19 +9,20 @@ from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceInfo
 
 from .const import DOMAIN
-from .models import WifiBox, Devices
+from .coordinator import BesmartCoordinator
+from .models import WifiBox
 
 class BesmartInterfaceDevice:
     """Class for BeSMART WiFi Box handling."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, wifi_box: WifiBox, devices: Devices) -> None:
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, wifi_box: WifiBox, coordinator: BesmartCoordinator) -> None:
         """Initialize interface device class."""
         device_registry = dr.async_get(hass)
 
         device_id = (DOMAIN, entry.entry_id)
         self.wifi_box = wifi_box
-        self.boiler = devices["boiler"]
-        self.thermostats = devices["thermostats"]
+        self.boiler = coordinator.data.boiler
+        self.thermostats = list(coordinator.data.thermostats.values())
         self.device = device_registry.async_get_or_create(
             config_entry_id=entry.entry_id,
             identifiers={device_id},
@@ -31,3 +32,4 @@ class BesmartInterfaceDevice:
             model_id=wifi_box,
         )
         self.device_info = DeviceInfo(identifiers={device_id})
+        self.coordinator = coordinator
@@ -0,0 +1,51 @@
+"""Diagnostics support for BeSMART."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    return {
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+        "circuit_breaker": entry.runtime_data.circuit_state,
+        "cache": {
+            "hits": entry.runtime_data.cache_hits,
+            "misses": entry.runtime_data.cache_misses,
+        },
+        "parsing": {
+            "applied": entry.runtime_data.parse_applied,
+            "skipped": entry.runtime_data.parse_skipped,
+        },
+        "metrics": entry.runtime_data.metrics.as_dict(),
+        "scheduler": {
+            "queued": entry.runtime_data.scheduler.queued,
+            "superseded": entry.runtime_data.scheduler.superseded,
+        },
+        "wifi_boxes": {
+            device.wifi_box: {
+                "polling": {
+                    "interval": device.coordinator.polling.interval.total_seconds(),
+                    "reason": device.coordinator.polling.reason,
+                },
+                "last_update_success": device.coordinator.last_update_success,
+                "stale": device.coordinator.data.stale,
+                "updates": {
+                    "applied": device.coordinator.updates_applied,
+                    "skipped": device.coordinator.updates_skipped,
+                },
+            }
+            for device in entry.interface_devices
+        },
+    }
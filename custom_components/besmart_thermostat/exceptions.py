@@ -0,0 +1,29 @@
+"""Exceptions raised by the BeSMART API client."""
+
+
+class BesmartError(Exception):
+    """Base class for BeSMART API errors."""
+
+
+class BesmartTimeoutError(BesmartError):
+    """Raised when the BeSMART API does not answer in time."""
+
+
+class BesmartServerError(BesmartError):
+    """Raised when the BeSMART API is unreachable or answers with a 5xx status."""
+
+
+class BesmartAuthError(BesmartError):
+    """Raised when the BeSMART API rejects the credentials or the session."""
+
+
+class BesmartRequestError(BesmartError):
+    """Raised when the BeSMART API refuses a request with another 4xx status."""
+
+
+class BesmartPayloadError(BesmartError):
+    """Raised when the BeSMART API answers with an unexpected payload."""
+
+
+class BesmartCircuitOpenError(BesmartError):
+    """Raised instead of calling the BeSMART API while it is degraded."""
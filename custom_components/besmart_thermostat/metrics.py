@@ -0,0 +1,125 @@
+"""Request metrics of the BeSMART client."""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter, defaultdict, deque
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Seconds of requests the request rate is computed over
+RATE_WINDOW = 900.0
+
+
+def endpoint_name(endpoint: str) -> str:
+    """Return the path of an endpoint template, without its parameters."""
+    return re.split(r"/user_id/|\?", endpoint, maxsplit=1)[0]
+
+
+class RequestStats:
+    """Counters and latency histogram of a set of requests."""
+
+    def __init__(self) -> None:
+        """Initialize empty stats."""
+        self.requests = 0
+        self.errors: Counter[str] = Counter()
+        self.bytes = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.max_latency = 0.0
+        self._started = time.monotonic()
+        self._recent: deque[float] = deque()
+
+    def record(self, latency: float, size: int, error: str | None, now: float) -> None:
+        """Record a request."""
+        self.requests += 1
+        self.bytes += size
+        if error is not None:
+            self.errors[error] += 1
+        self.max_latency = max(self.max_latency, latency)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS)
+        self.buckets[index] += 1
+        self._recent.append(now)
+        self._prune(now)
+
+    def percentile(self, q: float) -> float | None:
+        """Return an estimate of the latency percentile q (0-100), in seconds.
+
+        The estimate is the upper bound of the bucket holding the percentile, or
+        the highest latency seen for the last bucket.
+        """
+        total = sum(self.buckets)
+        if total == 0:
+            return None
+        rank = q / 100 * total
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                if index < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[index], self.max_latency)
+                return self.max_latency
+        return self.max_latency
+
+    def rate(self, now: float | None = None) -> float:
+        """Return the number of requests per minute over the last RATE_WINDOW."""
+        now = time.monotonic() if now is None else now
+        self._prune(now)
+        # At least a minute, so that the requests of a setup do not look like a storm
+        span = min(max(now - self._started, 60.0), RATE_WINDOW)
+        return len(self._recent) * 60 / span
+
+    def as_dict(self) -> dict:
+        """Return the raw stats, e.g. for diagnostics."""
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "bytes": self.bytes,
+            "latency_histogram": {
+                **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "le_inf": self.buckets[-1],
+            },
+            "latency_p50": self.percentile(50),
+            "latency_p95": self.percentile(95),
+            "max_latency": self.max_latency,
+            "requests_per_minute": round(self.rate(), 2),
+        }
+
+    def _prune(self, now: float) -> None:
+        while self._recent and now - self._recent[0] > RATE_WINDOW:
+            self._recent.popleft()
+
+
+class ClientMetrics:
+    """Request stats of a client, per endpoint and per WiFi box."""
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.endpoints: defaultdict[str, RequestStats] = defaultdict(RequestStats)
+        self.wifi_boxes: defaultdict[str, RequestStats] = defaultdict(RequestStats)
+
+    def record(
+        self,
+        endpoint: str,
+        wifi_box: str | None,
+        latency: float,
+        size: int,
+        error: str | None = None,
+    ) -> None:
+        """Record a request to an endpoint, on behalf of a WiFi box if any."""
+        now = time.monotonic()
+        self.endpoints[endpoint_name(endpoint)].record(latency, size, error, now)
+        if wifi_box is not None:
+            self.wifi_boxes[str(wifi_box)].record(latency, size, error, now)
+
+    def as_dict(self) -> dict:
+        """Return the raw stats, e.g. for diagnostics."""
+        return {
+            "endpoints": {name: stats.as_dict() for name, stats in self.endpoints.items()},
+            "wifi_boxes": {name: stats.as_dict() for name, stats in self.wifi_boxes.items()},
+        }
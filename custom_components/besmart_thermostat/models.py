@@ -1,8 +1,246 @@
-from typing import List, Dict, TypedDict
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, TypedDict
+
+from .exceptions import BesmartPayloadError
+from .program import DAYS, WeeklyProgram
 
 class WifiBox(TypedDict):
     id: str
 
-class Devices(TypedDict):
-    boiler: Dict
-    thermostats: List[Dict]
+
+@dataclass(frozen=True, slots=True)
+class ThermostatSnapshot:
+    """State of a thermostat as reported by the BeSMART cloud.
+
+    Fields missing from a payload are None, e.g. the WiFi box payload only
+    carries a summary of each thermostat.
+    """
+
+    id: str
+    name: str | None = None
+    mode: int | None = None
+    season: str | None = None
+    unit: str | None = None
+    current_temp: float | None = None
+    target_temp: float | None = None
+    frost_temp: float | None = None
+    economy_temp: float | None = None
+    comfort_temp: float | None = None
+    heating: bool | None = None
+    battery_low: bool | None = None
+    advance: bool | None = None
+    holiday_end_time: int | None = None
+    program: WeeklyProgram | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ThermostatSettings:
+    """Settings of a thermostat, all of them are sent back with any change."""
+
+    unit: str | None = None
+    season: str | None = None
+    min_heating_set_point: str | None = None
+    max_heating_set_point: str | None = None
+    sensor_influence: str | None = None
+    climatic_curve: str | None = None
+
+    def as_fields(self) -> dict[str, str]:
+        """Return the known settings as request fields."""
+        return {
+            name: value
+            for name in self.__slots__
+            if (value := getattr(self, name)) is not None
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class BoilerSnapshot:
+    """State of a boiler as reported by the BeSMART cloud."""
+
+    mode: str | None = None
+    work_mode: str | None = None
+    unit: str | None = None
+    dhw_current_temp: float | None = None
+    dhw_target_temp: float | None = None
+    flame_status: float | None = None
+    system_pressure: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class WifiBoxSnapshot:
+    """State of all devices connected to a WiFi box."""
+
+    boiler: BoilerSnapshot
+    thermostats: Dict[str, ThermostatSnapshot]
+    # Restored from storage and not refreshed from the cloud yet
+    stale: bool = False
+
+
+def _str(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+def _float(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value: Any) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flag(value: Any) -> bool | None:
+    return None if value is None else str(value) == "1"
+
+
+def _program(value: Any) -> WeeklyProgram | None:
+    if value is None:
+        return None
+    try:
+        return WeeklyProgram.from_payload(value)
+    except (TypeError, ValueError) as ex:
+        raise BesmartPayloadError(f"Invalid program: {ex}") from ex
+
+
+def _require_dict(payload: Any, kind: str) -> dict:
+    if not isinstance(payload, dict):
+        raise BesmartPayloadError(f"Unexpected {kind} data: {payload!r}")
+    return payload
+
+
+def parse_thermostat(payload: Any, thermostat_id: str | None = None) -> ThermostatSnapshot:
+    """Parse thermostat data (or a thermostat summary of the WiFi box data)."""
+    payload = _require_dict(payload, "thermostat")
+    battery_power = _int(payload.get("battery_power"))
+    return ThermostatSnapshot(
+        id=thermostat_id or _str(payload.get("id")),
+        name=_str(payload.get("name")),
+        mode=_int(payload.get("mode")),
+        season=_str(payload.get("season")),
+        unit=_str(payload.get("unit")),
+        current_temp=_float(payload.get("current_temp")),
+        target_temp=_float(payload.get("target_temp")),
+        frost_temp=_float(payload.get("frost_temp")),
+        economy_temp=_float(payload.get("economy_temp")),
+        comfort_temp=_float(payload.get("comfort_temp")),
+        heating=_flag(payload.get("heating_status")),
+        battery_low=None if battery_power is None else not battery_power,
+        advance=_flag(payload.get("advance")),
+        holiday_end_time=_int(payload.get("holiday_end_time")),
+        program=_program(payload.get("program")),
+    )
+
+
+def parse_program_day(payload: Any) -> tuple[int, str]:
+    """Parse the program of a single day, returning the day and its marks."""
+    payload = _require_dict(payload, "program")
+    day = _int(payload.get("day"))
+    program = payload.get("program")
+    if day is None or not 0 <= day < DAYS or not isinstance(program, list):
+        raise BesmartPayloadError(f"Unexpected program data: {payload!r}")
+    return day, "".join(str(x) for x in program)
+
+
+def parse_thermostat_settings(payload: Any) -> ThermostatSettings:
+    """Parse thermostat settings."""
+    payload = _require_dict(payload, "thermostat settings")
+    return ThermostatSettings(
+        unit=_str(payload.get("unit")),
+        season=_str(payload.get("season")),
+        min_heating_set_point=_str(payload.get("min_heating_set_point")),
+        max_heating_set_point=_str(payload.get("max_heating_set_point")),
+        sensor_influence=_str(payload.get("sensor_influence")),
+        climatic_curve=_str(payload.get("climatic_curve")),
+    )
+
+
+def parse_boiler(payload: Any) -> BoilerSnapshot:
+    """Parse boiler data (or the boiler summary of the WiFi box data)."""
+    if payload is None:
+        return BoilerSnapshot()
+    payload = _require_dict(payload, "boiler")
+    return BoilerSnapshot(
+        mode=_str(payload.get("mode")),
+        work_mode=_str(payload.get("work_mode")),
+        unit=_str(payload.get("unit")),
+        dhw_current_temp=_float(payload.get("dhw_current_temp")),
+        dhw_target_temp=_float(payload.get("dhw_target_temp")),
+        flame_status=_float(payload.get("flame_status")),
+        system_pressure=_float(payload.get("system_pressure")),
+    )
+
+
+def parse_wifi_box(payload: Any) -> WifiBoxSnapshot:
+    """Parse WiFi box data, skipping unused thermostat slots."""
+    payload = _require_dict(payload, "wifi box")
+    thermostats = payload.get("thermostat")
+    if not isinstance(thermostats, list):
+        raise BesmartPayloadError(f"Unexpected thermostats: {thermostats!r}")
+    return WifiBoxSnapshot(
+        boiler=parse_boiler(payload.get("boiler")),
+        thermostats={
+            snapshot.id: snapshot
+            for snapshot in map(parse_thermostat, thermostats)
+            if snapshot.id is not None
+        },
+    )
+
+
+def merge(base, update):
+    """Return base updated with all fields known to update."""
+    changes = {
+        name: value
+        for name in type(update).__slots__
+        if (value := getattr(update, name)) is not None
+    }
+    return replace(base, **changes) if changes else base
+
+
+def _dump(snapshot) -> dict:
+    data = {
+        name: value
+        for name in type(snapshot).__slots__
+        if (value := getattr(snapshot, name)) is not None
+    }
+    if isinstance(program := data.get("program"), WeeklyProgram):
+        data["program"] = program.marks
+    return data
+
+
+def _load(cls, data: dict):
+    _require_dict(data, cls.__name__)
+    fields = {name: data[name] for name in cls.__slots__ if name in data}
+    if isinstance(program := fields.get("program"), str):
+        fields["program"] = WeeklyProgram(program)
+    return cls(**fields)
+
+
+def dump_wifi_box(snapshot: WifiBoxSnapshot) -> dict:
+    """Return a snapshot as JSON serializable data, e.g. for storage."""
+    return {
+        "boiler": _dump(snapshot.boiler),
+        "thermostats": {x: _dump(thermostat) for x, thermostat in snapshot.thermostats.items()},
+    }
+
+
+def load_wifi_box(data: Any) -> WifiBoxSnapshot:
+    """Return a snapshot from data returned by dump_wifi_box, marked as stale."""
+    data = _require_dict(data, "stored WiFi box")
+    try:
+        return WifiBoxSnapshot(
+            boiler=_load(BoilerSnapshot, data["boiler"]),
+            thermostats={
+                x: _load(ThermostatSnapshot, thermostat)
+                for x, thermostat in _require_dict(data["thermostats"], "stored thermostats").items()
+            },
+            stale=True,
+        )
+    except (KeyError, TypeError, ValueError) as ex:
+        raise BesmartPayloadError(f"Invalid stored WiFi box data: {ex}") from ex
@@ -0,0 +1,111 @@
+"""Tracking of BeSMART commands until the cloud reflects them."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PendingCommand:
+    """A value written to a device and not yet reported back by the cloud."""
+
+    value: Any
+    cancel_expiry: CALLBACK_TYPE
+
+
+def _matches(actual: Any, expected: Any) -> bool:
+    if actual == expected:
+        return True
+    try:
+        return abs(float(actual) - float(expected)) < 0.05
+    except (TypeError, ValueError):
+        return str(actual) == str(expected)
+
+
+class PendingCommandTracker:
+    """Class applying written values optimistically until they are confirmed.
+
+    Values are overlaid on the device data until a later snapshot reports them,
+    or dropped once `timeout` passes, which rolls the state back to the snapshot.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        timeout: timedelta,
+        update_listeners: Callable[[], None],
+    ) -> None:
+        """Initialize the tracker."""
+        self._hass = hass
+        self._timeout = timeout
+        self._update_listeners = update_listeners
+        self._commands: dict[tuple[str, str], PendingCommand] = {}
+
+    @callback
+    def async_add(self, device_id: str, field: str, value: Any) -> None:
+        """Apply a written value to the state of a device right away."""
+        key = (device_id, field)
+        previous = self._commands.pop(key, None)
+        if previous is not None:
+            previous.cancel_expiry()
+
+        self._commands[key] = PendingCommand(
+            value,
+            async_call_later(self._hass, self._timeout, partial(self._async_expire, key)),
+        )
+        self._update_listeners()
+
+    def is_pending(self, device_id: str, *fields: str) -> bool:
+        """Return whether a device has unconfirmed commands (for the given fields)."""
+        return any(
+            x == device_id and (not fields or field in fields)
+            for x, field in self._commands
+        )
+
+    def apply(self, device_id: str, data: Any) -> Any:
+        """Return the device snapshot with all unconfirmed values applied."""
+        overlay = {
+            field: command.value
+            for (x, field), command in self._commands.items()
+            if x == device_id
+        }
+        return replace(data, **overlay) if overlay else data
+
+    @callback
+    def async_confirm(self, device_id: str, data: Any) -> None:
+        """Drop commands the latest device snapshot already reflects."""
+        for key, command in list(self._commands.items()):
+            x, field = key
+            if x == device_id and _matches(getattr(data, field), command.value):
+                _LOGGER.debug("%s of %s confirmed: %s", field, device_id, command.value)
+                command.cancel_expiry()
+                del self._commands[key]
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Drop all commands."""
+        for command in self._commands.values():
+            command.cancel_expiry()
+        self._commands.clear()
+
+    @callback
+    def _async_expire(self, key: tuple[str, str], _now: datetime) -> None:
+        command = self._commands.pop(key, None)
+        if command is None:
+            return
+        device_id, field = key
+        _LOGGER.warning(
+            "%s of %s was not confirmed within %s, rolling back from %s",
+            field, device_id, self._timeout, command.value,
+        )
+        self._update_listeners()
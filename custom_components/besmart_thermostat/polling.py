@@ -0,0 +1,81 @@
+"""Adaptive polling intervals for BeSMART WiFi boxes."""
+
+from __future__ import annotations
+
+import random
+import time
+from datetime import timedelta
+from enum import StrEnum
+
+from .const import (
+    BURST_DURATION,
+    BURST_SCAN_INTERVAL,
+    IDLE_AFTER_UNCHANGED,
+    MAX_ERROR_SCAN_INTERVAL,
+    MAX_IDLE_SCAN_INTERVAL,
+)
+
+
+class PollingReason(StrEnum):
+    """Reason of the current polling interval."""
+
+    DEFAULT = "default"
+    WRITE = "write"
+    TRANSITION = "transition"
+    IDLE = "idle"
+    ERROR = "error"
+
+
+class AdaptivePolling:
+    """Class computing the interval until the next poll of a WiFi box.
+
+    Polls run every BURST_SCAN_INTERVAL for BURST_DURATION after a command or a
+    program transition, slow down while snapshots stay unchanged and back off
+    exponentially (with jitter) while the cloud keeps failing.
+    """
+
+    def __init__(self, interval: timedelta) -> None:
+        """Initialize the polling policy."""
+        self._default = interval
+        self._burst_until = 0.0
+        self._burst_reason = PollingReason.WRITE
+        self._unchanged = 0
+        self._errors = 0
+        self.interval = interval
+        self.reason = PollingReason.DEFAULT
+
+    def burst(self, reason: PollingReason) -> timedelta:
+        """Poll faster for a while."""
+        self._burst_until = time.monotonic() + BURST_DURATION.total_seconds()
+        self._burst_reason = reason
+        self._unchanged = 0
+        if self._errors == 0:
+            self._set(BURST_SCAN_INTERVAL, reason)
+        return self.interval
+
+    def success(self, changed: bool) -> timedelta:
+        """Compute the interval after a successful poll."""
+        self._errors = 0
+        self._unchanged = 0 if changed else self._unchanged + 1
+
+        if time.monotonic() < self._burst_until:
+            self._set(BURST_SCAN_INTERVAL, self._burst_reason)
+        elif self._unchanged >= IDLE_AFTER_UNCHANGED:
+            idle = self._default * 2 ** min(self._unchanged - IDLE_AFTER_UNCHANGED + 1, 10)
+            # Never slower than MAX_IDLE_SCAN_INTERVAL, unless configured so
+            self._set(min(idle, max(MAX_IDLE_SCAN_INTERVAL, self._default)), PollingReason.IDLE)
+        else:
+            self._set(self._default, PollingReason.DEFAULT)
+        return self.interval
+
+    def failure(self) -> timedelta:
+        """Compute the interval after a failed poll."""
+        self._errors += 1
+        backoff = min(self._default * 2 ** min(self._errors, 10), MAX_ERROR_SCAN_INTERVAL)
+        # Spread retries of many boxes and accounts over the second half of the window
+        self._set(backoff * random.uniform(0.5, 1.0), PollingReason.ERROR)
+        return self.interval
+
+    def _set(self, interval: timedelta, reason: PollingReason) -> None:
+        self.interval = interval
+        self.reason = reason
@@ -0,0 +1,137 @@
+"""Weekly programs of BeSMART thermostats."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+
+DAYS = 7
+SLOTS_PER_DAY = 48
+SLOT = timedelta(minutes=30)
+MARKS = "012"
+
+# Names of the program days, in program order
+DAY_NAMES = ("sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday")
+
+
+class WeeklyProgram:
+    """Compact weekly program of a thermostat.
+
+    The program holds one temperature mark per 30 minute slot, from Sunday
+    00:00 to Saturday 23:30: "0" (frost), "1" (economy) or "2" (comfort).
+
+    Programs parsed from a payload keep its day arrays and only join them
+    into marks when those are asked for. Polls mostly compare programs and
+    look up the current slot, which the arrays answer as well.
+    """
+
+    __slots__ = ("_marks", "_days")
+
+    def __init__(self, marks: str | None = None, days: list | None = None) -> None:
+        """Initialize the program from 7 x 48 marks, or from the day arrays of a payload."""
+        if marks is not None and len(marks) != DAYS * SLOTS_PER_DAY:
+            raise ValueError(f"Expected {DAYS * SLOTS_PER_DAY} program slots, got {len(marks)}")
+        if marks is None and (
+            len(days) != DAYS or any(len(day) != SLOTS_PER_DAY for day in days)
+        ):
+            raise ValueError(f"Expected {DAYS} days of {SLOTS_PER_DAY} program slots")
+        self._marks = marks
+        self._days = days
+
+    @property
+    def marks(self) -> str:
+        """Return the marks of the whole week."""
+        if self._marks is None:
+            self._marks = "".join(map(str, chain.from_iterable(self._days)))
+        return self._marks
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WeeklyProgram):
+            return NotImplemented
+        if self._days is not None and other._days is not None and self._days == other._days:
+            return True
+        return self.marks == other.marks
+
+    def __hash__(self) -> int:
+        return hash(self.marks)
+
+    def __repr__(self) -> str:
+        return f"WeeklyProgram({self.marks!r})"
+
+    @classmethod
+    def from_payload(cls, program: list) -> WeeklyProgram:
+        """Parse the program array of a thermostat payload."""
+        if not isinstance(program, list):
+            raise TypeError(f"Expected a list of days, got {type(program).__name__}")
+        return cls(days=program)
+
+    def as_payload(self) -> list[list[int]]:
+        """Return the program array of a thermostat payload."""
+        return [[int(x) for x in self.day(day)] for day in range(DAYS)]
+
+    def _mark(self, index: int) -> str:
+        if self._marks is not None:
+            return self._marks[index]
+        return str(self._days[index // SLOTS_PER_DAY][index % SLOTS_PER_DAY])
+
+    @classmethod
+    def from_days(cls, days: list[str]) -> WeeklyProgram:
+        """Create a program from the marks of each day, Sunday first."""
+        for marks in days:
+            if len(marks) != SLOTS_PER_DAY or marks.strip(MARKS):
+                raise ValueError(f"Invalid day program: {marks!r}")
+        return cls("".join(days))
+
+    def day(self, day: int) -> str:
+        """Return the marks of a day (0 is Sunday)."""
+        return self.marks[day * SLOTS_PER_DAY:(day + 1) * SLOTS_PER_DAY]
+
+    def days(self) -> list[str]:
+        """Return the marks of each day, Sunday first."""
+        return [self.day(day) for day in range(DAYS)]
+
+    def replace_days(self, changes: dict[int, str]) -> WeeklyProgram:
+        """Return the program with the marks of some days replaced."""
+        days = self.days()
+        for day, marks in changes.items():
+            days[day] = marks
+        return self.from_days(days)
+
+    def changed_days(self, other: WeeklyProgram) -> list[int]:
+        """Return the days whose marks differ in another program."""
+        return [day for day in range(DAYS) if self.day(day) != other.day(day)]
+
+    @staticmethod
+    def slot(when: datetime) -> int:
+        """Return the index of the slot containing the given time."""
+        # from Sunday (0) to Saturday (6)
+        day = when.isoweekday() % 7
+        return day * SLOTS_PER_DAY + when.hour * 2 + when.minute // 30
+
+    def mark_at(self, when: datetime) -> str:
+        """Return the temperature mark active at the given time."""
+        return self._mark(self.slot(when))
+
+    def next_transition(self, when: datetime) -> datetime | None:
+        """Return the start of the next slot with another mark, if any.
+
+        Slots follow the local wall clock of `when`, and the returned time
+        carries the UTC offset in effect then, also across a DST change. A
+        slot starting in the hour skipped when clocks go forward resolves to
+        the same wall time an hour later.
+        """
+        index = self.slot(when)
+        current = self._mark(index)
+        size = DAYS * SLOTS_PER_DAY
+        for step in range(1, size):
+            if self._mark((index + step) % size) != current:
+                slot_start = when.replace(minute=when.minute // 30 * 30, second=0, microsecond=0)
+                return _normalize(slot_start + step * SLOT)
+        return None
+
+
+def _normalize(when: datetime) -> datetime:
+    """Return an aware wall time with the UTC offset in effect at that instant."""
+    if when.tzinfo is None:
+        return when
+    return when.astimezone(timezone.utc).astimezone(when.tzinfo)
@@ -0,0 +1,89 @@
+"""Request scheduling of a BeSMART account."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Hashable
+from enum import IntEnum
+
+
+class RequestPriority(IntEnum):
+    """Priority of a request, lower values are sent first."""
+
+    WRITE = 0
+    READ = 1
+
+
+class RequestSuperseded(Exception):
+    """Raised to a queued request whose result is no longer needed."""
+
+
+class RequestScheduler:
+    """Class handing out request slots of an account from a token bucket.
+
+    Up to `burst` requests are sent right away, after that `rate` requests per
+    minute. Queued requests are served by priority, then in order of arrival,
+    so that commands never wait behind background polls.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize the scheduler with a full bucket."""
+        self._rate = rate / 60
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._queue: list[tuple[int, int, Hashable | None, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.superseded = 0
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return sum(1 for *_, waiter in self._queue if not waiter.done())
+
+    async def acquire(self, priority: RequestPriority, key: Hashable | None = None) -> None:
+        """Wait for a slot to send a request.
+
+        Raises RequestSuperseded if the request is superseded while queued.
+        """
+        self._refill()
+        if not self._queue and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), key, waiter))
+        self._schedule()
+        await waiter
+
+    def supersede(self, key: Hashable) -> None:
+        """Drop queued requests for the given key."""
+        for _, _, x, waiter in self._queue:
+            if x == key and not waiter.done():
+                waiter.set_exception(RequestSuperseded())
+                self.superseded += 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._queue:
+            delay = max(0.0, (1 - self._tokens) / self._rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._queue and self._tokens >= 1:
+            *_, waiter = heapq.heappop(self._queue)
+            # Cancelled and superseded requests do not take a slot
+            if not waiter.done():
+                waiter.set_result(None)
+                self._tokens -= 1
+        self._schedule()
@@ -0,0 +1,106 @@
+"""Diagnostic sensors of the BeSMART cloud connection."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .metrics import RequestStats
+
+# Metrics are kept locally, polling them is free
+SCAN_INTERVAL = timedelta(minutes=1)
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return None if seconds is None else seconds * 1000
+
+
+@dataclass(frozen=True, kw_only=True)
+class BesmartMetricDescription(SensorEntityDescription):
+    """Description of a sensor reporting request stats of a WiFi box."""
+
+    value_fn: Callable[[RequestStats], float | None]
+
+
+METRICS: tuple[BesmartMetricDescription, ...] = (
+    BesmartMetricDescription(
+        key="latency_p50",
+        name="Cloud latency p50",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        value_fn=lambda stats: _milliseconds(stats.percentile(50)),
+    ),
+    BesmartMetricDescription(
+        key="latency_p95",
+        name="Cloud latency p95",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        value_fn=lambda stats: _milliseconds(stats.percentile(95)),
+    ),
+    BesmartMetricDescription(
+        key="request_rate",
+        name="Cloud request rate",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="requests/min",
+        suggested_display_precision=1,
+        value_fn=lambda stats: stats.rate(),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    new_entities = []
+
+    for device in config_entry.interface_devices:
+        for description in METRICS:
+            new_entities.append(MetricSensor(config_entry, device, description))
+
+    if new_entities:
+        async_add_entities(new_entities, True)
+
+
+class MetricSensor(SensorEntity):
+    """Sensor reporting request stats of a WiFi box."""
+
+    entity_description: BesmartMetricDescription
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = True
+
+    def __init__(self, config_entry, interface_device, description):
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._cl = config_entry.runtime_data
+        self._wifi_box = interface_device.wifi_box
+
+        # link to BeSMART device
+        self._attr_device_info = interface_device.device_info
+
+        # unique_id = <deviceID>:<wifiBoxID>:<metric>
+        self._attr_unique_id = f"{config_entry.entry_id}:{self._wifi_box}:{description.key}"
+
+    async def async_update(self) -> None:
+        """Update the value from the client metrics."""
+        self._attr_native_value = self.entity_description.value_fn(
+            self._cl.metrics.wifi_boxes[str(self._wifi_box)]
+        )
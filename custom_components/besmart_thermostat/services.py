@@ -0,0 +1,326 @@
+"""Services of the BeSMART integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import partial
+
+import voluptuous as vol
+
+from homeassistant.components.climate import ATTR_PRESET_MODE, DOMAIN as CLIMATE_DOMAIN, HVACMode
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .api import BesmartClient
+from .climate import Thermostat
+from .const import DOMAIN, SERVICE_CONCURRENCY
+from .coordinator import BesmartCoordinator
+from .device import BesmartInterfaceDevice
+from .exceptions import BesmartError
+from .program import DAY_NAMES, MARKS, SLOTS_PER_DAY
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_WIFI_BOX = "wifi_box"
+ATTR_SEASON = "season"
+ATTR_SETPOINT = "setpoint"
+ATTR_PROGRAM = "program"
+
+SERVICE_SET_SEASON = "set_season"
+SERVICE_SET_CLIMATE = "set_climate"
+SERVICE_GET_PROGRAM = "get_program"
+SERVICE_SET_PROGRAM = "set_program"
+
+SET_SEASON_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_WIFI_BOX): cv.string,
+        vol.Required(ATTR_SEASON): vol.In([HVACMode.HEAT, HVACMode.COOL]),
+    }
+)
+
+SET_CLIMATE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+            vol.Optional(ATTR_PRESET_MODE): vol.In(Thermostat.PRESET_MODE_LIST),
+            vol.Inclusive(ATTR_TEMPERATURE, "setpoint"): vol.Coerce(float),
+            vol.Inclusive(ATTR_SETPOINT, "setpoint"): vol.In(list(Thermostat.SETPOINTS)),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_PRESET_MODE, ATTR_TEMPERATURE),
+)
+
+
+
+def _day_program(value) -> str:
+    """Validate the marks of a day, one per 30 minutes."""
+    value = cv.string(value)
+    if len(value) != SLOTS_PER_DAY or value.strip(MARKS):
+        raise vol.Invalid(f"Expected {SLOTS_PER_DAY} marks out of {MARKS}")
+    return value
+
+
+GET_PROGRAM_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+    }
+)
+
+SET_PROGRAM_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Required(ATTR_PROGRAM): vol.All(
+            {vol.In(DAY_NAMES): _day_program},
+            vol.Length(min=1),
+        ),
+    }
+)
+
+# Outcome of a thermostat in a service response
+RESULT_SWITCHED = "switched"
+RESULT_UPDATED = "updated"
+RESULT_UNCHANGED = "unchanged"
+RESULT_FAILED = "failed"
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_SEASON,
+        partial(_async_set_season, hass),
+        schema=SET_SEASON_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_CLIMATE,
+        partial(_async_set_climate, hass),
+        schema=SET_CLIMATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PROGRAM,
+        partial(_async_get_program, hass),
+        schema=GET_PROGRAM_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_PROGRAM,
+        partial(_async_set_program, hass),
+        schema=SET_PROGRAM_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _async_get_entry(hass: HomeAssistant, call: ServiceCall) -> ConfigEntry:
+    """Return the loaded config entry a service call targets."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(f"Unknown BeSMART config entry: {entry_id}")
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"BeSMART config entry {entry.title} is not loaded")
+    return entry
+
+
+def _async_get_thermostats(
+    hass: HomeAssistant, call: ServiceCall
+) -> dict[str, tuple[BesmartClient, BesmartInterfaceDevice, str]]:
+    """Return the client, WiFi box and id of each thermostat entity a service call targets."""
+    registry = er.async_get(hass)
+    thermostats = {}
+    for entity_id in call.data[ATTR_ENTITY_ID]:
+        entity = registry.async_get(entity_id)
+        if entity is None or entity.platform != DOMAIN or entity.domain != CLIMATE_DOMAIN:
+            raise ServiceValidationError(f"{entity_id} is not a BeSMART thermostat")
+        entry = hass.config_entries.async_get_entry(entity.config_entry_id)
+        if entry is None or entry.state is not ConfigEntryState.LOADED:
+            raise ServiceValidationError(f"BeSMART thermostat {entity_id} is not loaded")
+
+        # unique_id = <entryID>:<roomID>
+        room_id = entity.unique_id.split(":", 1)[1]
+        device = next(
+            (x for x in entry.interface_devices if room_id in x.coordinator.data.thermostats),
+            None,
+        )
+        if device is None:
+            raise ServiceValidationError(f"BeSMART thermostat {entity_id} is not available")
+        thermostats[entity_id] = (entry.runtime_data, device, room_id)
+    return thermostats
+
+
+def _interface_devices(entry: ConfigEntry, call: ServiceCall) -> list[BesmartInterfaceDevice]:
+    """Return the WiFi boxes of a config entry a service call targets."""
+    devices = entry.interface_devices
+    if (wifi_box := call.data.get(ATTR_WIFI_BOX)) is not None:
+        devices = [device for device in devices if str(device.wifi_box) == wifi_box]
+        if not devices:
+            raise ServiceValidationError(f"Unknown WiFi box {wifi_box} of {entry.title}")
+    return devices
+
+
+async def _async_set_season(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Switch the season of all thermostats of the targeted WiFi boxes.
+
+    Thermostats already in the season are left alone, the others are switched
+    concurrently, at most SERVICE_CONCURRENCY at a time.
+    """
+    entry = _async_get_entry(hass, call)
+    client = entry.runtime_data
+    season = Thermostat.HVAC_MODE_HA_BESMART[call.data[ATTR_SEASON]]
+    semaphore = asyncio.Semaphore(SERVICE_CONCURRENCY)
+
+    async def switch(device: BesmartInterfaceDevice, thermostat_id: str) -> str:
+        async with semaphore:
+            if not await client.setThermostatSeason(device.wifi_box, thermostat_id, season):
+                return RESULT_FAILED
+        device.coordinator.pending.async_add(thermostat_id, "season", season)
+        return RESULT_SWITCHED
+
+    async def switch_wifi_box(device: BesmartInterfaceDevice) -> dict:
+        coordinator = device.coordinator
+        thermostats = {
+            thermostat_id: coordinator.pending.apply(thermostat_id, thermostat)
+            for thermostat_id, thermostat in coordinator.data.thermostats.items()
+        }
+        outdated = [
+            thermostat_id
+            for thermostat_id, thermostat in thermostats.items()
+            if thermostat.season != season
+        ]
+        results = dict(zip(outdated, await asyncio.gather(*(switch(device, x) for x in outdated))))
+        if outdated:
+            await coordinator.async_request_device_refresh(*outdated)
+
+        return {
+            thermostat_id: {
+                "name": thermostat.name,
+                "result": results.get(thermostat_id, RESULT_UNCHANGED),
+            }
+            for thermostat_id, thermostat in thermostats.items()
+        }
+
+    devices = _interface_devices(entry, call)
+    reports = await asyncio.gather(*(switch_wifi_box(device) for device in devices))
+    report = {str(device.wifi_box): result for device, result in zip(devices, reports)}
+    _LOGGER.debug("Set season %s: %s", season, report)
+    return {"wifi_boxes": report}
+
+
+async def _async_set_climate(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Set the preset and/or a setpoint of many thermostats at once.
+
+    Thermostats already in the requested state are left alone, the others are
+    written concurrently, at most SERVICE_CONCURRENCY at a time.
+    """
+    thermostats = _async_get_thermostats(hass, call)
+    mode = Thermostat.PRESET_HA_TO_BESMART.get(call.data.get(ATTR_PRESET_MODE))
+    temperature = call.data.get(ATTR_TEMPERATURE)
+    mark = Thermostat.SETPOINTS.get(call.data.get(ATTR_SETPOINT))
+    field = Thermostat.TEMP_FIELDS.get(mark)
+    semaphore = asyncio.Semaphore(SERVICE_CONCURRENCY)
+
+    async def update(client: BesmartClient, device: BesmartInterfaceDevice, room_id: str) -> str:
+        coordinator = device.coordinator
+        thermostat = coordinator.pending.apply(room_id, coordinator.data.thermostats[room_id])
+        writes = []
+        if mode is not None and thermostat.mode != mode:
+            writes.append(("mode", mode))
+        if field is not None and not _same_temperature(getattr(thermostat, field), temperature):
+            writes.append((field, temperature))
+        if not writes:
+            return RESULT_UNCHANGED
+
+        result = RESULT_UPDATED
+        async with semaphore:
+            for name, value in writes:
+                if name == "mode":
+                    written = await client.setThermostatMode(device.wifi_box, room_id, value)
+                else:
+                    written = await client.setThermostatTemp(device.wifi_box, room_id, value, mark)
+                if written:
+                    coordinator.pending.async_add(room_id, name, value)
+                else:
+                    result = RESULT_FAILED
+        return result
+
+    results = await asyncio.gather(*(update(*thermostat) for thermostat in thermostats.values()))
+
+    # One refresh per WiFi box, including the details of all written thermostats
+    written: dict[BesmartCoordinator, list[str]] = {}
+    for (_, device, room_id), result in zip(thermostats.values(), results):
+        if result != RESULT_UNCHANGED:
+            written.setdefault(device.coordinator, []).append(room_id)
+    for coordinator, room_ids in written.items():
+        await coordinator.async_request_device_refresh(*room_ids)
+
+    report = {entity_id: result for entity_id, result in zip(thermostats, results)}
+    _LOGGER.debug("Set climate of %d thermostats: %s", len(report), report)
+    return {"thermostats": report}
+
+
+async def _async_get_program(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the weekly program of thermostats, from the program cache if up to date."""
+    thermostats = _async_get_thermostats(hass, call)
+
+    async def read(client: BesmartClient, device: BesmartInterfaceDevice, room_id: str) -> dict:
+        coordinator = device.coordinator
+        thermostat = coordinator.pending.apply(room_id, coordinator.data.thermostats[room_id])
+        try:
+            program = await client.thermostatProgram(device.wifi_box, room_id, thermostat.program)
+        except BesmartError as ex:
+            raise HomeAssistantError(f"Unable to read the program of {thermostat.name}: {ex}") from ex
+        return dict(zip(DAY_NAMES, program.days()))
+
+    programs = await asyncio.gather(*(read(*thermostat) for thermostat in thermostats.values()))
+    return {"thermostats": dict(zip(thermostats, programs))}
+
+
+async def _async_set_program(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Change days of the weekly program of thermostats.
+
+    Only the days differing from the current program are uploaded, thermostats
+    without any are left alone. At most SERVICE_CONCURRENCY thermostats are
+    written at the same time.
+    """
+    thermostats = _async_get_thermostats(hass, call)
+    changes = {DAY_NAMES.index(day): marks for day, marks in call.data[ATTR_PROGRAM].items()}
+    semaphore = asyncio.Semaphore(SERVICE_CONCURRENCY)
+
+    async def update(client: BesmartClient, device: BesmartInterfaceDevice, room_id: str) -> dict:
+        coordinator = device.coordinator
+        thermostat = coordinator.pending.apply(room_id, coordinator.data.thermostats[room_id])
+        async with semaphore:
+            try:
+                current = await client.thermostatProgram(device.wifi_box, room_id, thermostat.program)
+            except BesmartError as ex:
+                _LOGGER.warning("Unable to read the program of %s: %s", thermostat.name, ex)
+                return {"result": RESULT_FAILED, "days": []}
+            program = current.replace_days(changes)
+            days = [DAY_NAMES[day] for day in current.changed_days(program)]
+            if not days:
+                return {"result": RESULT_UNCHANGED, "days": days}
+            if not await client.setThermostatProgram(device.wifi_box, room_id, program, current):
+                return {"result": RESULT_FAILED, "days": days}
+        coordinator.pending.async_add(room_id, "program", program)
+        await coordinator.async_request_device_refresh(room_id)
+        return {"result": RESULT_UPDATED, "days": days}
+
+    results = await asyncio.gather(*(update(*thermostat) for thermostat in thermostats.values()))
+    report = dict(zip(thermostats, results))
+    _LOGGER.debug("Set program of %d thermostats: %s", len(report), report)
+    return {"thermostats": report}
+
+
+def _same_temperature(current: float | None, temperature: float) -> bool:
+    return current is not None and abs(current - temperature) < 0.05
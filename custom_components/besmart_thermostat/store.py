@@ -0,0 +1,104 @@
+"""Storage of the last known BeSMART data."""
+
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .api import BesmartClient
+from .const import DOMAIN, STORE_SAVE_DELAY
+from .coordinator import BesmartCoordinator
+from .exceptions import BesmartPayloadError
+from .models import WifiBoxSnapshot, dump_wifi_box, load_wifi_box
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+class BesmartStore:
+    """Class persisting the WiFi boxes of a config entry and their last snapshot.
+
+    On the next start entities are set up from the stored data right away,
+    marked as stale until the cloud answers. The session of the account is
+    stored as well, so that no login is needed until the cloud rejects it.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store of a config entry."""
+        self._store: Store[dict] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self.wifi_boxes: list[str] | None = None
+        self.snapshots: dict[str, WifiBoxSnapshot] = {}
+        self.session: dict | None = None
+        self._client: BesmartClient | None = None
+        self._coordinators: dict[str, BesmartCoordinator] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored data, ignoring it if it is invalid."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        try:
+            wifi_boxes = [str(x) for x in data["wifi_boxes"]]
+            snapshots = {str(x): load_wifi_box(snapshot) for x, snapshot in data["snapshots"].items()}
+            session = data.get("session")
+            if session is not None:
+                session = {
+                    "username": str(session["username"]),
+                    "credentials": session.get("credentials"),
+                    "user_id": session["user_id"],
+                    "wifi_boxes": [str(x) for x in session["wifi_boxes"]],
+                }
+        except (AttributeError, KeyError, TypeError, BesmartPayloadError) as ex:
+            _LOGGER.warning("Ignoring stored data of %s: %s", self._store.key, ex)
+            return
+        self.wifi_boxes = wifi_boxes
+        self.snapshots = snapshots
+        self.session = session
+
+    @callback
+    def async_track(
+        self,
+        client: BesmartClient,
+        wifi_boxes: list[str],
+        coordinators: list[BesmartCoordinator],
+    ) -> list[CALLBACK_TYPE]:
+        """Save the WiFi boxes now and the session and data of the coordinators whenever it changes."""
+        self._client = client
+        self.wifi_boxes = [str(x) for x in wifi_boxes]
+        self._coordinators = {str(coordinator.wifi_box): coordinator for coordinator in coordinators}
+        self.async_schedule_save()
+        return [coordinator.async_add_listener(self.async_schedule_save) for coordinator in coordinators]
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the data a little later, batching changes of all WiFi boxes."""
+        self._store.async_delay_save(self._data_to_save, STORE_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Save the data right away, e.g. before a reload reads it."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the stored data."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict:
+        for wifi_box, coordinator in self._coordinators.items():
+            # Stale data is the stored data already
+            if coordinator.data is not None and not coordinator.data.stale:
+                self.snapshots[wifi_box] = coordinator.data
+        if self._client is not None and (session := self._client.session) is not None:
+            self.session = session
+        return {
+            "wifi_boxes": self.wifi_boxes,
+            "session": self.session,
+            "snapshots": {
+                x: dump_wifi_box(snapshot)
+                for x, snapshot in self.snapshots.items()
+                if x in self.wifi_boxes
+            },
+        }
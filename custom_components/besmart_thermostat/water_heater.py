@@ -13,7 +13,7 @@ tested with home-assistant >= 0.96
 import logging
 from datetime import datetime
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.components.water_heater import WaterHeaterEntity, WaterHeaterEntityFeature
 from homeassistant.components.water_heater.const import DOMAIN as PLATFORM_DOMAIN
@@ -24,8 +24,10 @@ from homeassistant.const import (
 )
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import DOMAIN, SNAPSHOT_MAX_AGE
+from .coordinator import BOILER, BesmartCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -49,7 +51,7 @@ async def async_setup_entry(
         new_entities.append(WaterHeater(hass, config_entry, wifi_box, device))
 
     if new_entities:
-        async_add_entities(new_entities, update_before_add=True)
+        async_add_entities(new_entities)
 
 
 async def async_remove_entry(hass, entry) -> None:
@@ -58,11 +60,10 @@ async def async_remove_entry(hass, entry) -> None:
 
 # pylint: disable=abstract-method
 # pylint: disable=too-many-instance-attributes
-class WaterHeater(WaterHeaterEntity):
+class WaterHeater(CoordinatorEntity[BesmartCoordinator], WaterHeaterEntity):
     """Representation of a Besmart water heater."""
 
     _attr_has_entity_name = True
-    _attr_should_poll = True
     _default_name = "Water Heater"
     _entity_id_format = ENTITY_ID_FORMAT
     _attr_unique_id: str
@@ -78,18 +79,23 @@ class WaterHeater(WaterHeaterEntity):
 
     def __init__(self, hass, config_entry, wifi_box, interface_device):
         """Initialize the thermostat."""
+        super().__init__(interface_device.coordinator)
         self._entry_name = config_entry.options[CONF_NAME]
         self._entry_id = config_entry.entry_id
         self._wifi_box = wifi_box
         self._cl = config_entry.runtime_data
-        self._current_temp = interface_device.boiler["dhw_current_temp"]
-        self._current_mode = interface_device.boiler["mode"]
+        self._current_temp = interface_device.boiler.dhw_current_temp
+        self._current_mode = interface_device.boiler.mode
         self._previous_climate_active = None
         if len(interface_device.thermostats) > 0:
-            self._current_unit = interface_device.thermostats[0]["unit"]
+            self._current_unit = interface_device.thermostats[0].unit
         else:
             self._current_unit = "0"
         self._tempSet = 0.0
+        self._flame_status = 0
+        self._system_pressure = 0.0
+        self._stale = False
+        self._fingerprint = None
 
         # link to BeSMART device
         self._attr_device_info = interface_device.device_info
@@ -106,6 +112,8 @@ class WaterHeater(WaterHeaterEntity):
         # Disable backwards compatibility for new turn_on/off methods
         self._enable_turn_on_off_backwards_compatibility = False
 
+        self._update_state()
+
     @property
     def current_temperature(self):
         """Return the current temperature."""
@@ -178,47 +186,35 @@ class WaterHeater(WaterHeaterEntity):
             # "heating_state": self._heating_state,
             "flame_status": self._flame_status,
             "system_pressure": self._system_pressure,
+            "stale": self._stale,
         }
 
-    async def async_update(self):
-        """Update the data from the thermostat."""
-        _LOGGER.debug("Update called")
-
-        # Get thermostat data
-        boiler = await self._cl.boiler(self._wifi_box)
-
-        # Current operation mode
-        try:
-            self._current_mode = boiler.get("work_mode")
-        except ValueError:
-            self._current_mode = "2"
-
-        # Extract programmed temperature
-        try:
-            self._tempSet = float(boiler.get("dhw_target_temp"))
-        except ValueError:
-            self._tempSet = 0.0
-
-        # Extract current temperature
-        try:
-            self._current_temp = float(boiler.get("dhw_current_temp"))
-        except ValueError:
-            self._current_temp = 0.0
-
-        # Extract flame status
-        try:
-            self._flame_status = float(boiler.get("flame_status"))
-        except ValueError:
-            self._flame_status = 0
-
-        # Extract system pressure
-        try:
-            self._system_pressure = float(boiler.get("system_pressure"))
-        except ValueError:
-            self._system_pressure = 0.0
-
-        # Misc
-        self._current_unit = boiler.get("unit")
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self._update_state():
+            self.coordinator.updates_applied += 1
+            super()._handle_coordinator_update()
+        else:
+            self.coordinator.updates_skipped += 1
+
+    def _update_state(self) -> bool:
+        """Update the state from the latest WiFi box data, returning whether it changed."""
+        boiler = self.coordinator.pending.apply(BOILER, self.coordinator.data.boiler)
+        # Availability follows the coordinator, its changes must be written too
+        fingerprint = (boiler, self.coordinator.data.stale, self.coordinator.last_update_success)
+        if fingerprint == self._fingerprint:
+            return False
+        self._fingerprint = fingerprint
+
+        self._current_mode = boiler.work_mode
+        self._tempSet = boiler.dhw_target_temp
+        self._current_temp = boiler.dhw_current_temp
+        self._flame_status = boiler.flame_status
+        self._system_pressure = boiler.system_pressure
+        self._current_unit = boiler.unit
+        self._stale = self.coordinator.data.stale
+        return True
 
     async def async_turn_on(self):
         """Turn off the heater"""
@@ -235,16 +231,26 @@ class WaterHeater(WaterHeaterEntity):
         if not temperature:
             return
 
-        await self._cl.setBoilerTemp(self._wifi_box, temperature)
+        if await self._cl.setBoilerTemp(self._wifi_box, temperature):
+            self.coordinator.pending.async_add(BOILER, "dhw_target_temp", float(temperature))
+        await self.coordinator.async_request_device_refresh(BOILER)
 
     async def async_set_operation_mode(self, mode):
         """Set HVAC mode (comfort, home, sleep, Party, Off)."""
         if mode == self.STATE_OFF:
-            devices = await self._cl.devices(self._wifi_box)
-            self._previous_climate_active = any(x["mode"] != "5" and x["mode"] != "4" for x in devices["thermostats"])
-            await self._cl.setBoilerMode(self._wifi_box, "2")
+            # Thermostat modes are polled anyway, only fetch them if they are outdated
+            data = await self.coordinator.async_get_snapshot(SNAPSHOT_MAX_AGE)
+            if data is not None:
+                self._previous_climate_active = any(
+                    self.coordinator.pending.apply(x.id, x).mode not in (4, 5)
+                    for x in data.thermostats.values()
+                )
+            work_mode = "2"
         elif self._previous_climate_active:
-            await self._cl.setBoilerMode(self._wifi_box, "0")
+            work_mode = "0"
         else:
-            await self._cl.setBoilerMode(self._wifi_box, "1")
-        _LOGGER.debug("Set operation mode=%s(%s)", str(mode))
+            work_mode = "1"
+        if await self._cl.setBoilerMode(self._wifi_box, work_mode):
+            self.coordinator.pending.async_add(BOILER, "work_mode", work_mode)
+        await self.coordinator.async_request_device_refresh(BOILER)
+        _LOGGER.debug("Set operation mode=%s(%s)", str(mode), work_mode)
@@ -0,0 +1,58 @@
+"""Tests of the circuit breaker."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.besmart_thermostat import circuit_breaker
+from custom_components.besmart_thermostat.circuit_breaker import CircuitBreaker
+from custom_components.besmart_thermostat.exceptions import BesmartCircuitOpenError
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch: pytest.MonkeyPatch) -> CircuitBreaker:
+    """Return a circuit breaker running on the fake clock."""
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+
+def test_opens_after_consecutive_failures(breaker: CircuitBreaker) -> None:
+    """Test the circuit opens after the threshold of consecutive failures."""
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.check()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(BesmartCircuitOpenError):
+        breaker.check()
+
+
+def test_success_resets_failures(breaker: CircuitBreaker) -> None:
+    """Test only consecutive failures open the circuit."""
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_after_timeout(breaker: CircuitBreaker, clock) -> None:
+    """Test the next request after the timeout decides the state."""
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(60)
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.check()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.advance(60)
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
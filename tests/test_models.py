@@ -0,0 +1,73 @@
+"""Tests of the snapshot models."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.besmart_thermostat.exceptions import BesmartPayloadError
+from custom_components.besmart_thermostat.models import (
+    BoilerSnapshot,
+    ThermostatSnapshot,
+    WifiBoxSnapshot,
+    dump_wifi_box,
+    load_wifi_box,
+    merge,
+)
+from custom_components.besmart_thermostat.program import DAYS, WeeklyProgram
+
+PROGRAM = WeeklyProgram.from_days(["1" * 14 + "2" * 34] * DAYS)
+
+
+def test_merge_overlays_known_fields() -> None:
+    """Test only fields known to the update replace those of the base."""
+    base = ThermostatSnapshot(id="1", name="Room", mode=0, current_temp=20.0, target_temp=21.0)
+    update = ThermostatSnapshot(id="1", current_temp=20.5, heating=True)
+
+    merged = merge(base, update)
+
+    assert merged == ThermostatSnapshot(
+        id="1", name="Room", mode=0, current_temp=20.5, target_temp=21.0, heating=True
+    )
+
+
+def test_merge_without_changes_returns_base() -> None:
+    """Test an update without known fields returns the base as is."""
+    base = BoilerSnapshot(mode="1", dhw_current_temp=45.0)
+
+    assert merge(base, BoilerSnapshot()) is base
+
+
+def test_dump_and_load_wifi_box() -> None:
+    """Test stored snapshots load back equal and marked as stale."""
+    snapshot = WifiBoxSnapshot(
+        boiler=BoilerSnapshot(mode="1", dhw_current_temp=45.0, flame_status=0.0),
+        thermostats={
+            "1": ThermostatSnapshot(id="1", name="Room", mode=0, target_temp=21.0, program=PROGRAM),
+            "2": ThermostatSnapshot(id="2", battery_low=True),
+        },
+    )
+
+    data = dump_wifi_box(snapshot)
+    loaded = load_wifi_box(data)
+
+    assert data["thermostats"]["1"]["program"] == PROGRAM.marks
+    assert "current_temp" not in data["thermostats"]["1"]
+    assert loaded.stale
+    assert loaded.boiler == snapshot.boiler
+    assert loaded.thermostats == snapshot.thermostats
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        None,
+        {"boiler": {}},
+        {"boiler": {}, "thermostats": []},
+        {"boiler": {}, "thermostats": {"1": {"name": "Room"}}},
+        {"boiler": {}, "thermostats": {"1": {"id": "1", "program": "12"}}},
+    ],
+)
+def test_load_invalid_wifi_box(data) -> None:
+    """Test invalid stored data is rejected."""
+    with pytest.raises(BesmartPayloadError):
+        load_wifi_box(data)
@@ -0,0 +1,103 @@
+"""Tests of the pending command tracker."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from custom_components.besmart_thermostat import pending
+from custom_components.besmart_thermostat.models import ThermostatSnapshot
+from custom_components.besmart_thermostat.pending import PendingCommandTracker
+
+
+class FakeTimers:
+    """Stand-in for async_call_later, firing expiries by hand."""
+
+    def __init__(self) -> None:
+        self.pending: list = []
+
+    def __call__(self, hass, delay, action):
+        self.pending.append(action)
+        return lambda: self.pending.remove(action)
+
+    def fire(self) -> None:
+        for action in list(self.pending):
+            self.pending.remove(action)
+            action(None)
+
+
+@pytest.fixture
+def timers(monkeypatch: pytest.MonkeyPatch) -> FakeTimers:
+    """Replace the expiry timers of the tracker."""
+    timers = FakeTimers()
+    monkeypatch.setattr(pending, "async_call_later", timers)
+    return timers
+
+
+@pytest.fixture
+def listeners() -> Mock:
+    """Return the listener update callback of the tracker."""
+    return Mock()
+
+
+@pytest.fixture
+def tracker(timers: FakeTimers, listeners: Mock) -> PendingCommandTracker:
+    """Return a tracker with fake timers."""
+    return PendingCommandTracker(None, timedelta(minutes=5), listeners)
+
+
+SNAPSHOT = ThermostatSnapshot(id="1", mode=0, target_temp=21.0)
+
+
+def test_apply_until_confirmed(tracker: PendingCommandTracker, timers: FakeTimers, listeners: Mock) -> None:
+    """Test written values overlay snapshots until one reports them."""
+    tracker.async_add("1", "target_temp", 19.5)
+
+    assert listeners.call_count == 1
+    assert tracker.is_pending("1")
+    assert tracker.is_pending("1", "target_temp")
+    assert not tracker.is_pending("1", "mode")
+    assert not tracker.is_pending("2")
+    assert tracker.apply("1", SNAPSHOT).target_temp == 19.5
+    assert tracker.apply("2", SNAPSHOT) is SNAPSHOT
+
+    tracker.async_confirm("1", SNAPSHOT)
+    assert tracker.is_pending("1")
+
+    # Values match as numbers, as reported by the cloud
+    tracker.async_confirm("1", ThermostatSnapshot(id="1", target_temp=19.51))
+    assert not tracker.is_pending("1")
+    assert timers.pending == []
+
+
+def test_newer_value_replaces_pending(tracker: PendingCommandTracker, timers: FakeTimers) -> None:
+    """Test a newer write replaces the pending value and its expiry."""
+    tracker.async_add("1", "mode", 1)
+    tracker.async_add("1", "mode", 2)
+
+    assert len(timers.pending) == 1
+    assert tracker.apply("1", SNAPSHOT).mode == 2
+
+
+def test_rollback_on_expiry(tracker: PendingCommandTracker, timers: FakeTimers, listeners: Mock) -> None:
+    """Test unconfirmed values are dropped once they expire."""
+    tracker.async_add("1", "target_temp", 19.5)
+
+    timers.fire()
+
+    assert not tracker.is_pending("1")
+    assert tracker.apply("1", SNAPSHOT) is SNAPSHOT
+    assert listeners.call_count == 2
+
+
+def test_shutdown(tracker: PendingCommandTracker, timers: FakeTimers) -> None:
+    """Test shutting down drops commands and their timers."""
+    tracker.async_add("1", "target_temp", 19.5)
+    tracker.async_add("2", "mode", 1)
+
+    tracker.async_shutdown()
+
+    assert not tracker.is_pending("1")
+    assert timers.pending == []
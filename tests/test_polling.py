@@ -0,0 +1,89 @@
+"""Tests of the adaptive polling interval."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+
+from custom_components.besmart_thermostat import polling
+from custom_components.besmart_thermostat.const import (
+    BURST_DURATION,
+    BURST_SCAN_INTERVAL,
+    IDLE_AFTER_UNCHANGED,
+    MAX_ERROR_SCAN_INTERVAL,
+    MAX_IDLE_SCAN_INTERVAL,
+)
+from custom_components.besmart_thermostat.polling import AdaptivePolling, PollingReason
+
+INTERVAL = timedelta(minutes=1)
+
+
+@pytest.fixture(autouse=True)
+def fake_time(clock, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Run polling on the fake clock, without jitter."""
+    monkeypatch.setattr(polling.time, "monotonic", clock)
+    monkeypatch.setattr(polling.random, "uniform", lambda low, high: high)
+
+
+def test_default_while_changing() -> None:
+    """Test changing snapshots keep the configured interval."""
+    policy = AdaptivePolling(INTERVAL)
+
+    assert policy.success(True) == INTERVAL
+    assert policy.reason == PollingReason.DEFAULT
+
+
+def test_burst_after_write(clock) -> None:
+    """Test polls run faster for a while after a command."""
+    policy = AdaptivePolling(INTERVAL)
+
+    assert policy.burst(PollingReason.WRITE) == BURST_SCAN_INTERVAL
+    assert policy.success(False) == BURST_SCAN_INTERVAL
+    assert policy.reason == PollingReason.WRITE
+
+    clock.advance(BURST_DURATION.total_seconds())
+    assert policy.success(True) == INTERVAL
+
+
+def test_idle_backoff() -> None:
+    """Test unchanged snapshots slow polling down up to its maximum."""
+    policy = AdaptivePolling(INTERVAL)
+
+    for _ in range(IDLE_AFTER_UNCHANGED - 1):
+        assert policy.success(False) == INTERVAL
+    assert policy.success(False) == INTERVAL * 2
+    assert policy.reason == PollingReason.IDLE
+    for _ in range(10):
+        policy.success(False)
+    assert policy.interval == MAX_IDLE_SCAN_INTERVAL
+
+    assert policy.success(True) == INTERVAL
+
+
+def test_idle_backoff_keeps_longer_interval() -> None:
+    """Test an interval above the idle maximum is never shortened."""
+    interval = MAX_IDLE_SCAN_INTERVAL * 2
+    policy = AdaptivePolling(interval)
+
+    for _ in range(IDLE_AFTER_UNCHANGED + 2):
+        policy.success(False)
+
+    assert policy.interval == interval
+
+
+def test_error_backoff() -> None:
+    """Test failures back off exponentially up to their maximum."""
+    policy = AdaptivePolling(INTERVAL)
+
+    assert policy.failure() == INTERVAL * 2
+    assert policy.failure() == INTERVAL * 4
+    assert policy.reason == PollingReason.ERROR
+    for _ in range(10):
+        policy.failure()
+    assert policy.interval == MAX_ERROR_SCAN_INTERVAL
+
+    # A burst does not cut the backoff short
+    policy.burst(PollingReason.WRITE)
+    assert policy.interval == MAX_ERROR_SCAN_INTERVAL
+    assert policy.success(True) == BURST_SCAN_INTERVAL
@@ -0,0 +1,119 @@
+"""Tests of weekly programs."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from custom_components.besmart_thermostat.program import DAYS, SLOTS_PER_DAY, WeeklyProgram
+
+ROME = ZoneInfo("Europe/Rome")
+# Economy until 07:00, comfort until 22:00, economy until midnight
+DAY = "1" * 14 + "2" * 30 + "1" * 4
+
+
+def test_from_payload_matches_from_days() -> None:
+    """Test programs parsed from day arrays equal those made from marks."""
+    payload = [[int(x) for x in DAY] for _ in range(DAYS)]
+    program = WeeklyProgram.from_payload(payload)
+
+    assert program == WeeklyProgram.from_days([DAY] * DAYS)
+    assert hash(program) == hash(WeeklyProgram.from_days([DAY] * DAYS))
+    assert program.marks == DAY * DAYS
+    assert program.as_payload() == payload
+
+
+@pytest.mark.parametrize(
+    ("args", "kwargs"),
+    [
+        (("1" * 10,), {}),
+        ((), {"days": [[1] * SLOTS_PER_DAY] * 6}),
+        ((), {"days": [[1] * 47] * DAYS}),
+    ],
+)
+def test_invalid_size(args: tuple, kwargs: dict) -> None:
+    """Test programs of the wrong size are rejected."""
+    with pytest.raises(ValueError):
+        WeeklyProgram(*args, **kwargs)
+
+
+def test_from_days_rejects_invalid_marks() -> None:
+    """Test days with unknown marks are rejected."""
+    with pytest.raises(ValueError):
+        WeeklyProgram.from_days(["3" * SLOTS_PER_DAY] * DAYS)
+
+
+def test_replace_days() -> None:
+    """Test replacing days and listing the days that changed."""
+    program = WeeklyProgram.from_days([DAY] * DAYS)
+    saturday = "0" * SLOTS_PER_DAY
+
+    changed = program.replace_days({6: saturday, 1: DAY})
+
+    assert changed.day(6) == saturday
+    assert changed.day(1) == DAY
+    assert program.changed_days(changed) == [6]
+    assert program.changed_days(program) == []
+
+
+def test_mark_at() -> None:
+    """Test the mark of the slot containing a time, Sunday first."""
+    program = WeeklyProgram.from_days(["0" * SLOTS_PER_DAY] + [DAY] * (DAYS - 1))
+
+    # 2026-10-18 is a Sunday
+    assert program.mark_at(datetime(2026, 10, 18, 8, 0)) == "0"
+    assert program.mark_at(datetime(2026, 10, 19, 6, 59)) == "1"
+    assert program.mark_at(datetime(2026, 10, 19, 7, 0)) == "2"
+    assert program.mark_at(datetime(2026, 10, 24, 23, 45)) == "1"
+
+
+def test_next_transition() -> None:
+    """Test the start of the next slot with another mark."""
+    program = WeeklyProgram.from_days([DAY] * DAYS)
+    when = datetime(2026, 10, 19, 6, 10, tzinfo=ROME)
+
+    assert program.next_transition(when) == datetime(2026, 10, 19, 7, 0, tzinfo=ROME)
+    assert program.next_transition(datetime(2026, 10, 19, 7, 0, tzinfo=ROME)) == datetime(
+        2026, 10, 19, 22, 0, tzinfo=ROME
+    )
+
+
+def test_next_transition_without_changes() -> None:
+    """Test a program with a single mark has no transition."""
+    program = WeeklyProgram.from_days(["1" * SLOTS_PER_DAY] * DAYS)
+
+    assert program.next_transition(datetime(2026, 10, 19, 6, 10, tzinfo=ROME)) is None
+
+
+@pytest.mark.parametrize(
+    ("when", "elapsed"),
+    [
+        # Clocks go forward at 02:00 on 2026-03-29
+        (datetime(2026, 3, 29, 0, 10, tzinfo=ROME), timedelta(hours=5, minutes=50)),
+        # Clocks go back at 03:00 on 2026-10-25
+        (datetime(2026, 10, 25, 0, 10, tzinfo=ROME), timedelta(hours=7, minutes=50)),
+    ],
+)
+def test_next_transition_across_dst(when: datetime, elapsed: timedelta) -> None:
+    """Test transitions across a DST change happen at the programmed wall time."""
+    program = WeeklyProgram.from_days([DAY] * DAYS)
+
+    transition = program.next_transition(when)
+
+    assert (transition.hour, transition.minute) == (7, 0)
+    assert transition.utcoffset() == transition.tzinfo.utcoffset(transition.replace(tzinfo=None))
+    assert transition.timestamp() - when.timestamp() == elapsed.total_seconds()
+
+
+def test_next_transition_in_skipped_hour() -> None:
+    """Test a slot starting in the skipped hour resolves to after the jump."""
+    # Comfort from 02:30
+    program = WeeklyProgram.from_days(["1" * 5 + "2" * 43] * DAYS)
+    when = datetime(2026, 3, 29, 1, 10, tzinfo=ROME)
+
+    transition = program.next_transition(when)
+
+    assert transition == datetime(2026, 3, 29, 3, 30, tzinfo=ROME)
+    assert transition.timestamp() > datetime(2026, 3, 29, 3, 0, tzinfo=ROME).timestamp()
@@ -0,0 +1,74 @@
+"""Tests of the request scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.besmart_thermostat.scheduler import (
+    RequestPriority,
+    RequestScheduler,
+    RequestSuperseded,
+)
+
+# Requests per minute, a slot every 50ms
+RATE = 1200
+
+
+def test_burst_is_sent_right_away() -> None:
+    """Test requests within the burst do not wait."""
+
+    async def run() -> None:
+        scheduler = RequestScheduler(RATE, burst=3)
+        for _ in range(3):
+            await asyncio.wait_for(scheduler.acquire(RequestPriority.READ), 0.01)
+        assert scheduler.queued == 0
+
+    asyncio.run(run())
+
+
+def test_writes_are_sent_before_reads() -> None:
+    """Test queued writes get the next slots before earlier reads."""
+
+    async def run() -> list[str]:
+        scheduler = RequestScheduler(RATE, burst=1)
+        await scheduler.acquire(RequestPriority.READ)
+        order = []
+
+        async def request(name: str, priority: RequestPriority) -> None:
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(request("read 1", RequestPriority.READ)),
+            asyncio.create_task(request("read 2", RequestPriority.READ)),
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("write", RequestPriority.WRITE)))
+        await asyncio.sleep(0)
+        assert scheduler.queued == 3
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["write", "read 1", "read 2"]
+
+
+def test_supersede() -> None:
+    """Test superseded requests leave the queue without taking a slot."""
+
+    async def run() -> None:
+        scheduler = RequestScheduler(RATE, burst=1)
+        await scheduler.acquire(RequestPriority.READ)
+        superseded = asyncio.create_task(scheduler.acquire(RequestPriority.READ, "key"))
+        other = asyncio.create_task(scheduler.acquire(RequestPriority.READ, "other"))
+        await asyncio.sleep(0)
+
+        scheduler.supersede("key")
+
+        with pytest.raises(RequestSuperseded):
+            await superseded
+        await asyncio.wait_for(other, 0.2)
+        assert scheduler.superseded == 1
+
+    asyncio.run(run())